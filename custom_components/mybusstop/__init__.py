@@ -1,149 +1,295 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import time
+from functools import partial
+from typing import Any, Optional
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.event import async_track_time_change
 from datetime import timedelta
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 
 from .const import (
     DOMAIN,
+    DATA_DOMAIN_POLLER,
     CONF_DISCOVERY_TIME,
+    CONF_MAX_CONCURRENT_POLLS,
+    CONF_POLL_TIMEOUT,
+    CONF_MIN_REFRESH_AGE,
+    CONF_FIRE_UPDATE_EVENT,
+    CONF_ACTIVE_SCAN_INTERVAL,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_STOP_LATITUDE,
+    CONF_STOP_LONGITUDE,
     DEFAULT_DISCOVERY_TIME,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_MIN_REFRESH_AGE,
+    DEFAULT_FIRE_UPDATE_EVENT,
+    ACTIVE_SCAN_INTERVAL,
+    IDLE_SCAN_INTERVAL,
+    ROUTE_REMOVAL_GRACE,
+    ATTR_MAX_AGE,
+    ATTR_NAME,
+    ATTR_LATITUDE,
+    ATTR_LONGITUDE,
+    ATTR_RADIUS,
+    ATTR_ROUTE_ID,
+    ATTR_CONFIG_ENTRY_ID,
 )
-from .api import MyBusStopApi, MyBusStopAuthError
+from .api import MyBusStopApi, MyBusStopAuth, MyBusStopAuthError
+from .eta import EtaEngine
+from .geofence import Geofence, GeofenceEngine
+from .motion import PollPacer
+from .poller import MyBusStopDomainPoller, MyBusStopPoller
+from .registry import RouteRegistry
+from .route_data import MyBusStopRouteData
+from .storage import MyBusStopStorage
+from .schedule import MyBusStopPollScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["sensor", "device_tracker"]
 
+UPDATE_BUS_LOCATION_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_MAX_AGE): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(ATTR_ROUTE_ID): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+ADD_GEOFENCE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_NAME): cv.string,
+        vol.Required(ATTR_LATITUDE): cv.latitude,
+        vol.Required(ATTR_LONGITUDE): cv.longitude,
+        vol.Required(ATTR_RADIUS): vol.All(vol.Coerce(float), vol.Range(min=1, max=50000)),
+        vol.Optional(ATTR_ROUTE_ID): vol.Coerce(int),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+REMOVE_GEOFENCE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_NAME): cv.string,
+        vol.Optional(ATTR_ROUTE_ID): vol.Coerce(int),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+SERVICES = ("update_bus_location", "add_geofence", "remove_geofence")
+
+
+def _target_entries(hass: HomeAssistant, call: ServiceCall) -> list[dict[str, Any]]:
+    """Return the loaded entries a service call applies to."""
+    entries = hass.data.get(DOMAIN, {})
+    entry_ids = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_ids is None:
+        return list(entries.values())
+    unknown = [entry_id for entry_id in entry_ids if entry_id not in entries]
+    if unknown:
+        raise HomeAssistantError(f"MyBusStop entry not loaded: {', '.join(unknown)}")
+    return [entries[entry_id] for entry_id in entry_ids]
+
+
+@callback
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register the domain's services once; they act on every loaded entry."""
+    if hass.services.has_service(DOMAIN, "update_bus_location"):
+        return
+
+    async def handle_update_bus_location(call: ServiceCall) -> None:
+        """Poll every loaded entry, or the ones given by config_entry_id."""
+        await hass.data[DATA_DOMAIN_POLLER].async_request_refresh(
+            call.data.get(ATTR_CONFIG_ENTRY_ID),
+            call.data.get(ATTR_MAX_AGE),
+            call.data.get(ATTR_ROUTE_ID),
+        )
+
+    async def handle_add_geofence(call: ServiceCall) -> None:
+        fence = Geofence(
+            name=call.data[ATTR_NAME],
+            latitude=call.data[ATTR_LATITUDE],
+            longitude=call.data[ATTR_LONGITUDE],
+            radius=call.data[ATTR_RADIUS],
+            route_id=call.data.get(ATTR_ROUTE_ID),
+        )
+        for entry_data in _target_entries(hass, call):
+            entry_data["geofences"].async_add(fence)
+            entry_data["storage"].async_schedule_save()
+
+    async def handle_remove_geofence(call: ServiceCall) -> None:
+        for entry_data in _target_entries(hass, call):
+            if entry_data["geofences"].async_remove(
+                call.data[ATTR_NAME], call.data.get(ATTR_ROUTE_ID)
+            ):
+                entry_data["storage"].async_schedule_save()
+
+    hass.services.async_register(
+        DOMAIN,
+        "update_bus_location",
+        handle_update_bus_location,
+        schema=UPDATE_BUS_LOCATION_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN, "add_geofence", handle_add_geofence, schema=ADD_GEOFENCE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, "remove_geofence", handle_remove_geofence, schema=REMOVE_GEOFENCE_SCHEMA
+    )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up MyBusStop from a config entry."""
+    setup_start = time.monotonic()
+    timings: dict[str, float] = {}
     hass.data.setdefault(DOMAIN, {})
 
-    session = async_get_clientsession(hass)
+    # Each account gets its own session so its cookie jar can be persisted
+    session = async_create_clientsession(hass)
     username: str = entry.data["username"]
     password: str = entry.data["password"]
 
-    # Create a temporary API to log in and discover available routes
-    api_template = MyBusStopApi(session, username, password, 0)
+    storage = MyBusStopStorage(hass, entry.entry_id)
+    await storage.async_load()
 
-    try:
-        await api_template.async_login()
-    except MyBusStopAuthError as err:
-        _LOGGER.error("Failed to log in to MyBusStop: %s", err)
-        raise
+    # One auth manager per account; every route client shares its login
+    auth = MyBusStopAuth(session, username, password)
+    api_template = MyBusStopApi(session, username, password, 0, auth=auth)
 
-    # Discover routes from the logged-in page
-    routes = await api_template.async_get_routes()
-    
-    # If no routes discovered (bus not running), try to use previously stored routes
-    if not routes:
-        _LOGGER.warning("No routes currently visible on MyBusStop (routes may not be running)")
-        
-        # Try to load previously discovered routes from config entry data
-        stored_routes = entry.data.get("discovered_routes", [])
-        if stored_routes:
-            _LOGGER.info("Using %d previously discovered route(s) from config", len(stored_routes))
-            routes = stored_routes
-        else:
+    # Routes from storage, or from config entry data saved by an older version
+    routes = storage.routes or list(entry.data.get("discovered_routes", []))
+    routes_restored = bool(routes)
+    if routes_restored:
+        # Reuse the stored session; it is validated by the first request
+        if storage.restore_cookies(session):
+            auth.restore_session()
+        _LOGGER.info("Using %d stored route(s), connecting in the background", len(routes))
+    else:
+        # First setup: nothing stored yet, so routes must be discovered now;
+        # discovery logs in and reads the routes from the logged-in page
+        try:
+            routes = await api_template.async_get_routes()
+        except MyBusStopAuthError as err:
+            _LOGGER.error("Failed to log in to MyBusStop: %s", err)
+            await session.close()
+            raise
+        if not routes:
             _LOGGER.error(
                 "No routes found and no previously stored routes available. "
                 "Please set up the integration when at least one bus route is active."
             )
+            await session.close()
             return False
-    else:
+
         # Save discovered routes to config entry for future use
         _LOGGER.info("Discovered %d route(s), saving to config", len(routes))
         new_data = dict(entry.data)
         new_data["discovered_routes"] = routes
         hass.config_entries.async_update_entry(entry, data=new_data)
 
-    apis: dict[int, MyBusStopApi] = {}
+    registry = RouteRegistry(routes)
+    apis: dict[int, MyBusStopApi] = {
+        rid: MyBusStopApi(session, username, password, rid, auth=auth) for rid in registry
+    }
 
-    for r in routes:
-        rid = int(r["id"])
-        api_i = MyBusStopApi(session, username, password, rid)
-        # ensure logged in for each API instance (cookies/session already set)
+    # Show the last-known positions right away
+    route_data = MyBusStopRouteData()
+    for rid, position in storage.positions.items():
+        if rid in apis:
+            route_data.async_set(rid, position)
+
+    # ETA to the configured stop (Home Assistant's home location by default)
+    eta = EtaEngine(
+        entry.options.get(CONF_STOP_LATITUDE, hass.config.latitude),
+        entry.options.get(CONF_STOP_LONGITUDE, hass.config.longitude),
+    )
+    try:
+        eta.restore_profiles(storage.eta_profiles)
+    except (TypeError, ValueError):
+        _LOGGER.debug("Ignoring unreadable stored ETA profiles")
+
+    # Named geofences; membership starts from the last-known positions so a
+    # restart does not report crossings that already happened
+    geofences = GeofenceEngine()
+    for raw in storage.geofences:
         try:
-            await api_i.async_login()
-        except MyBusStopAuthError:
-            _LOGGER.warning("Login failed for route %s, skipping", rid)
-            continue
-
-        apis[rid] = api_i
-
-    # Warn if no API instances were created (all routes offline)
-    if not apis:
-        _LOGGER.warning(
-            "No route APIs could be initialized (all routes may be offline). "
-            "Entities will be unavailable until routes become active."
-        )
+            geofences.async_add(Geofence(**raw))
+        except (TypeError, ValueError):
+            _LOGGER.debug("Ignoring stored geofence %s", raw)
+    for rid, position in route_data.items():
+        if position.has_location:
+            geofences.async_prime(rid, position.latitude, position.longitude)
+
+    # Stationary and inactive routes are polled less often by the scheduler
+    motion = PollPacer(
+        entry.options.get(CONF_ACTIVE_SCAN_INTERVAL, ACTIVE_SCAN_INTERVAL),
+        entry.options.get(CONF_IDLE_SCAN_INTERVAL, IDLE_SCAN_INTERVAL),
+    )
 
     # Initialize data storage
     hass.data[DOMAIN][entry.entry_id] = {
-        "routes": routes,
+        "registry": registry,
+        "auth": auth,
         "apis": apis,
-        "data": {},
+        "data": route_data,
+        "eta": eta,
+        "geofences": geofences,
+        "motion": motion,
+        "storage": storage,
+        "timings": timings,
     }
-    
-    # Fetch initial data for all routes
-    for rid, api in apis.items():
-        try:
-            data = await api.async_get_current()
-            if data is not None:
-                hass.data[DOMAIN][entry.entry_id]["data"][rid] = data
-                _LOGGER.debug("Initial data fetched for route %s", rid)
-            else:
-                _LOGGER.info("Route %s: No data available (route may not be running today)", rid)
-        except Exception as err:
-            _LOGGER.warning("Failed to fetch initial data for route %s: %s", rid, err)
+    storage.async_schedule_save()
 
-    # Schedule daily route discovery to catch changes (e.g., Friday-only route).
-    async def _discover_and_reload_if_changed(now) -> None:
+    @callback
+    def _async_routes_changed(added: set[int], removed: set[int]) -> None:
+        """Keep API clients, stored state and the entry data in line with the registry."""
+        for rid in added:
+            apis[rid] = MyBusStopApi(session, username, password, rid, auth=auth)
+        for rid in removed:
+            apis.pop(rid, None)
+            route_data.async_remove(rid)
+            eta.async_remove(rid)
+            geofences.async_remove_route(rid)
+            motion.async_remove(rid)
+        discovered = registry.as_discovered_list()
+        if entry.data.get("discovered_routes") != discovered:
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, "discovered_routes": discovered}
+            )
+        storage.async_schedule_save()
+
+    entry.async_on_unload(registry.async_add_listener(_async_routes_changed))
+
+    # Daily route discovery catches route changes (e.g., a Friday-only route)
+    # and applies them in place; the poller and entities follow the registry.
+    async def _async_discover_routes(now) -> None:
         try:
             new_routes = await api_template.async_get_routes()
         except Exception as err:  # don't crash the event loop
             _LOGGER.debug("Route discovery failed: %s", err)
             return
 
-        old_routes = hass.data[DOMAIN][entry.entry_id].get("routes", [])
-        old_ids = [int(r["id"]) for r in old_routes]
-        new_ids = [int(r["id"]) for r in new_routes]
-
-        # Compute newly discovered routes (add-only; do not remove disappeared routes)
-        add_ids = sorted(set(new_ids) - set(old_ids))
+        add_ids, removed_ids = registry.async_apply_discovery(
+            new_routes, time.time(), ROUTE_REMOVAL_GRACE
+        )
         if add_ids:
-            _LOGGER.info("MyBusStop new routes discovered, adding: %s", add_ids)
-            
-            # Create API instances for new routes
-            apis_dict = hass.data[DOMAIN][entry.entry_id]["apis"]
-            routes_list = hass.data[DOMAIN][entry.entry_id]["routes"]
-            
-            for rid in add_ids:
-                api_i = MyBusStopApi(session, username, password, rid)
-                try:
-                    await api_i.async_login()
-                    apis_dict[rid] = api_i
-                    
-                    # Find route name from new_routes
-                    route_info = next((r for r in new_routes if int(r["id"]) == rid), None)
-                    route_name = route_info.get("name", f"Route {rid}") if route_info else f"Route {rid}"
-                    routes_list.append({"id": rid, "name": route_name})
-                    
-                    _LOGGER.info("Added new route %s: %s", rid, route_name)
-                except MyBusStopAuthError:
-                    _LOGGER.warning("Login failed for new route %s, skipping", rid)
-                    continue
-            
-            # Reload to create new entities
-            try:
-                await hass.config_entries.async_reload(entry.entry_id)
-            except Exception as err:
-                _LOGGER.exception("Failed to reload MyBusStop entry after adding new routes: %s", err)
+            _LOGGER.info("MyBusStop new routes discovered, added: %s", sorted(add_ids))
+        if removed_ids:
+            _LOGGER.info(
+                "MyBusStop routes missing from discovery for %d days, removed: %s",
+                ROUTE_REMOVAL_GRACE // 86400,
+                sorted(removed_ids),
+            )
+        # Routes that went missing (or came back) are marked in storage
+        storage.async_schedule_save()
 
     # Schedule discovery at specific time daily
     discovery_time_str = entry.options.get(CONF_DISCOVERY_TIME, DEFAULT_DISCOVERY_TIME)
@@ -154,55 +300,79 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hour, minute = 2, 0
     
     handle = async_track_time_change(
-        hass, _discover_and_reload_if_changed, hour=hour, minute=minute, second=0
+        hass, _async_discover_routes, hour=hour, minute=minute, second=0
     )
     hass.data[DOMAIN][entry.entry_id]["routes_update_unsub"] = handle
     
     # Register listener for options updates
+    options = dict(entry.options)
+
     async def _async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
-        """Handle options update."""
+        """Handle options update; entry data changes (discovered routes) need no reload."""
+        if dict(entry.options) == options:
+            return
         await hass.config_entries.async_reload(entry.entry_id)
     
     entry.async_on_unload(entry.add_update_listener(_async_update_options))
 
-    # Register service for on-demand polling
-    async def handle_update_bus_location(call):
-        """Handle the service call to update bus location."""
-        apis_dict = hass.data[DOMAIN][entry.entry_id]["apis"]
-        
-        # Update all routes
-        if "data" not in hass.data[DOMAIN][entry.entry_id]:
-            hass.data[DOMAIN][entry.entry_id]["data"] = {}
-        
-        for route_key, api in apis_dict.items():
-            try:
-                data = await api.async_get_current()
-                if data is not None:
-                    hass.data[DOMAIN][entry.entry_id]["data"][route_key] = data
-                    _LOGGER.debug("Updated route %s with new data", route_key)
-                else:
-                    _LOGGER.debug("Route %s: No data available (route may not be running)", route_key)
-            except Exception as err:
-                _LOGGER.error("Failed to update route %s: %s", route_key, err)
-        
-        # Trigger entity updates
-        hass.bus.async_fire(f"{DOMAIN}_update", {})
-        _LOGGER.debug("Bus location update completed")
-    
-    hass.services.async_register(
-        DOMAIN,
-        "update_bus_location",
-        handle_update_bus_location,
+    # All entries poll through one domain-wide poller and request budget
+    domain_poller: Optional[MyBusStopDomainPoller] = hass.data.get(DATA_DOMAIN_POLLER)
+    if domain_poller is None:
+        domain_poller = hass.data[DATA_DOMAIN_POLLER] = MyBusStopDomainPoller(hass)
+    poller = MyBusStopPoller(
+        hass,
+        entry.entry_id,
+        entry.options.get(CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS),
+        entry.options.get(CONF_POLL_TIMEOUT, DEFAULT_POLL_TIMEOUT),
+        budget=domain_poller.budget,
+        min_refresh_age=entry.options.get(CONF_MIN_REFRESH_AGE, DEFAULT_MIN_REFRESH_AGE),
+        fire_event=entry.options.get(CONF_FIRE_UPDATE_EVENT, DEFAULT_FIRE_UPDATE_EVENT),
     )
+    hass.data[DOMAIN][entry.entry_id]["poller"] = poller
+    entry.async_on_unload(domain_poller.async_add_entry(entry.entry_id, poller))
+    _async_register_services(hass)
     
-    # Perform initial data fetch (non-blocking - entities will show as unavailable until data arrives)
+    # Poll automatically around the configured bus times
     try:
-        await handle_update_bus_location(None)
-    except Exception as err:
-        _LOGGER.warning("Initial data fetch failed (routes may not be running): %s", err)
-    
+        scheduler = MyBusStopPollScheduler.from_options(
+            hass, entry.options, partial(poller.async_request_refresh, paced=True)
+        )
+    except ValueError as err:
+        _LOGGER.warning("Invalid bus time in options, automatic polling disabled: %s", err)
+    else:
+        hass.data[DOMAIN][entry.entry_id]["scheduler"] = scheduler
+        scheduler.async_start()
+        entry.async_on_unload(scheduler.async_stop)
+
+    # Entities come up from stored state; login and the first poll follow
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    
+    timings["setup_seconds"] = round(time.monotonic() - setup_start, 3)
+    _LOGGER.debug("MyBusStop entry set up in %.3fs", timings["setup_seconds"])
+
+    async def _async_hydrate() -> None:
+        """Log in if needed and fetch initial data for all routes.
+
+        Stored routes are checked against the account first (discovery logs
+        in), so routes added since the last run show up without waiting for
+        the daily discovery.
+        """
+        start = time.monotonic()
+        if routes_restored:
+            await _async_discover_routes(None)
+        try:
+            await auth.async_ensure_logged_in()
+            await poller.async_request_refresh()
+        except Exception as err:
+            _LOGGER.warning("Initial data fetch failed (routes may not be running): %s", err)
+        timings["initial_refresh_seconds"] = round(time.monotonic() - start, 3)
+        _LOGGER.debug("Initial data fetch finished in %.3fs", timings["initial_refresh_seconds"])
+
+    # A background task: Home Assistant startup does not wait for it, and it
+    # is cancelled when the entry unloads
+    entry.async_create_background_task(
+        hass, _async_hydrate(), name=f"{DOMAIN}_hydrate_{entry.entry_id}"
+    )
+
     return True
 
 
@@ -219,8 +389,24 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
-        # Unregister service if this is the last entry
+        if "storage" in data:
+            await data["storage"].async_save()
+        # A refresh still running would find its data gone and the session closed
+        if "poller" in data:
+            await data["poller"].async_shutdown()
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if entry_data is not None:
+            await entry_data["auth"].session.close()
+        # Unregister services if this is the last entry
         if not hass.data[DOMAIN]:
-            hass.services.async_remove(DOMAIN, "update_bus_location")
+            for service in SERVICES:
+                hass.services.async_remove(DOMAIN, service)
+            domain_poller = hass.data.pop(DATA_DOMAIN_POLLER, None)
+            if domain_poller is not None:
+                domain_poller.budget.cancel()
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete stored session and positions when the entry is removed."""
+    await MyBusStopStorage(hass, entry.entry_id).async_remove()
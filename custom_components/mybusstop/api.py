@@ -1,14 +1,214 @@
+import asyncio
+import codecs
+import html as html_lib
+import json
 import logging
 import re
+import time
+from datetime import datetime, timedelta, timezone, tzinfo
 from typing import Any, Dict, Optional
 
-from aiohttp import ClientSession, ClientError
+from aiohttp import ClientSession, ClientError, ContentTypeError
+from homeassistant.util import dt as dt_util
 
-from .const import LOGIN_URL, CURRENT_URL
+from .const import BASE_URL, CURRENT_PATH, INDEX_PATH, LOGIN_PATH, LOGIN_TOKEN_TTL
+from .circuit import CircuitBreaker
+from .metrics import ApiMetrics
+from .models import BusPosition
 
 _LOGGER = logging.getLogger(__name__)
 
 
+# Formats seen from ASP.NET WebForms pages; time-only values are for today.
+_DATETIME_FORMATS = (
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+)
+_TIME_FORMATS = (
+    "%I:%M:%S %p",
+    "%I:%M %p",
+    "%H:%M:%S",
+    "%H:%M",
+)
+_MS_DATE_RE = re.compile(r"/Date\((-?\d+)(?:[+-]\d{4})?\)/")
+
+
+def _to_float(val: Any) -> Optional[float]:
+    try:
+        if val is None:
+            return None
+        s = str(val).strip()
+        if s == "" or s.lower() == "null":
+            return None
+        return float(s)
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse_offset(val: Any) -> Optional[tzinfo]:
+    """Parse the getCurrentNEW time zone field into a fixed-offset tzinfo.
+
+    Accepts hours ("-5", "-4.5") or "+HH:MM". Values larger than 14 are taken
+    to be minutes. Returns None if the field cannot be understood.
+    """
+    if val is None:
+        return None
+    s = str(val).strip()
+    m = re.fullmatch(r"([+-])?(\d{1,2}):(\d{2})", s)
+    if m:
+        minutes = int(m.group(2)) * 60 + int(m.group(3))
+        if m.group(1) == "-":
+            minutes = -minutes
+        return timezone(timedelta(minutes=minutes))
+    hours = _to_float(s)
+    if hours is None:
+        return None
+    minutes = hours if abs(hours) > 14 else hours * 60
+    try:
+        return timezone(timedelta(minutes=minutes))
+    except ValueError:
+        return None
+
+
+def _parse_timestamp(val: Any, tz: Optional[tzinfo]) -> Optional[float]:
+    """Parse a getCurrentNEW time string into epoch seconds.
+
+    Naive values are interpreted in ``tz`` (or Home Assistant's time zone when
+    the offset is unknown). Returns None if the value cannot be parsed.
+    """
+    if val is None:
+        return None
+    s = str(val).strip()
+    if not s or s.lower() == "null":
+        return None
+
+    m = _MS_DATE_RE.fullmatch(s)
+    if m:
+        return int(m.group(1)) / 1000
+
+    tz = tz or dt_util.DEFAULT_TIME_ZONE
+    for fmt in _DATETIME_FORMATS:
+        try:
+            parsed = datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+        return parsed.replace(tzinfo=tz).timestamp()
+
+    for fmt in _TIME_FORMATS:
+        try:
+            parsed_time = datetime.strptime(s, fmt).time()
+        except ValueError:
+            continue
+        today = datetime.now(tz).date()
+        return datetime.combine(today, parsed_time, tzinfo=tz).timestamp()
+
+    parsed_iso = dt_util.parse_datetime(s)
+    if parsed_iso is not None:
+        if parsed_iso.tzinfo is None:
+            parsed_iso = parsed_iso.replace(tzinfo=tz)
+        return parsed_iso.timestamp()
+
+    _LOGGER.debug("Could not parse timestamp %r", s)
+    return None
+
+
+_HIDDEN_INPUT_RE = re.compile(r'<input\b[^>]*\btype="hidden"[^>]*>', re.IGNORECASE)
+_INPUT_ATTR_RE = re.compile(r'(?<![\w-])(name|id|value)="([^"]*)"', re.IGNORECASE)
+_REQUIRED_FORM_TOKENS = ("__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION")
+
+_STREAM_CHUNK_SIZE = 8192
+# Inputs of the login form; a logged-in page never contains them
+_LOGIN_FORM_RE = re.compile(r'name=["\'](?:txtPassword|cmdLogin)["\']', re.IGNORECASE)
+_SELECT_OPEN_RE = re.compile(r"<select\b[^>]*>", re.IGNORECASE)
+_ROUTE_SELECT_RE = re.compile(r'\b(?:id|name)=["\'][^"\']*route', re.IGNORECASE)
+_SELECT_CLOSE_RE = re.compile(r"</select\s*>", re.IGNORECASE)
+_OPTION_RE = re.compile(r'<option[^>]*value="(\d+)"[^>]*>([^<]+)</option>', re.IGNORECASE)
+_PLACEHOLDER_NAMES = frozenset(["", "select", "-- select --", "please select"])
+
+
+class RouteOptionParser:
+    """Incremental parser for the route ``<select>`` on Index.aspx.
+
+    Feed it text in chunks. It keeps only the unparsed tail of the page and
+    sets ``done`` once the route ``<select>`` (id or name containing
+    "route", e.g. ``ddlRoute``) closes, so the caller can stop reading.
+    Options of other selects are collected too: if the page has no route
+    select, ``routes`` falls back to every option seen, as before.
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._in_select = False
+        self._route_select = False
+        self._select_routes: list[dict] = []
+        self._other_routes: list[dict] = []
+        self.done = False
+
+    @property
+    def routes(self) -> list[dict]:
+        """Routes of the route select, or every option seen without one."""
+        return self._select_routes if self.done else self._other_routes
+
+    def feed(self, text: str) -> None:
+        """Consume the next chunk of the page."""
+        if self.done:
+            return
+        self._buf += text
+        while not self.done:
+            if not self._in_select:
+                m = _SELECT_OPEN_RE.search(self._buf)
+                if m is None:
+                    # Keep only what could be the start of a split <select> tag
+                    cut = self._buf.rfind("<")
+                    self._buf = self._buf[cut:] if cut != -1 else ""
+                    return
+                self._in_select = True
+                self._route_select = _ROUTE_SELECT_RE.search(m.group(0)) is not None
+                self._buf = self._buf[m.end():]
+
+            close = _SELECT_CLOSE_RE.search(self._buf)
+            body = self._buf if close is None else self._buf[: close.start()]
+            last_end = 0
+            for m in _OPTION_RE.finditer(body):
+                self._add_option(m.group(1), m.group(2))
+                last_end = m.end()
+
+            if close is None:
+                # Keep a possibly split <option> (or </select>) for the next chunk
+                cut = self._buf.find("<option", last_end)
+                if cut == -1:
+                    cut = self._buf.rfind("<", last_end)
+                self._buf = self._buf[cut:] if cut != -1 else ""
+                return
+
+            self._buf = self._buf[close.end():]
+            self._in_select = False
+            if self._route_select:
+                self.done = True
+                self._buf = ""
+
+    def _add_option(self, rid: str, name: str) -> None:
+        name = name.strip()
+        # Skip empty or "Select" placeholder options
+        if name.lower() in _PLACEHOLDER_NAMES:
+            return
+        try:
+            route = {"id": int(rid), "name": name}
+        except ValueError:
+            _LOGGER.warning("Could not parse route id '%s' as integer", rid)
+            return
+        if self._route_select:
+            self._select_routes.append(route)
+            _LOGGER.debug("Found route: id=%s, name=%s", rid, name)
+        else:
+            self._other_routes.append(route)
+
+
 class MyBusStopAuthError(Exception):
     """Authentication / Login Error."""
 
@@ -17,26 +217,58 @@ class MyBusStopApiError(Exception):
     """Generic API error."""
 
 
-class MyBusStopApi:
-    """Simple client for MyBusStop WebForms API."""
+class MyBusStopCircuitOpenError(MyBusStopApiError):
+    """Requests are paused after repeated failures."""
+
+
+class MyBusStopAuth:
+    """Account-level login state shared by every route client.
+
+    All clients of one account share the aiohttp session (and therefore its
+    cookie jar), so a single login is enough for every route. Concurrent
+    re-login requests are merged into one in-flight login. ``base_url`` only
+    needs changing to talk to a local stand-in server.
+    """
 
     def __init__(
         self,
         session: ClientSession,
         username: str,
         password: str,
-        route_id: Optional[int] = None,
+        base_url: str = BASE_URL,
     ) -> None:
         self._session = session
+        self.base_url = base_url.rstrip("/")
+        self.login_url = f"{self.base_url}{LOGIN_PATH}"
+        self.index_url = f"{self.base_url}{INDEX_PATH}"
+        self.current_url = f"{self.base_url}{CURRENT_PATH}"
         self._username = username
         self._password = password
-        self._route_id = route_id
         self._logged_in = False
+        self._generation = 0
+        self._login_task: Optional[asyncio.Future] = None
+        self._form_tokens: Optional[Dict[str, str]] = None
+        self._form_tokens_at = 0.0
+        self.metrics = ApiMetrics()
+        self.circuit = CircuitBreaker()
+
+    @property
+    def session(self) -> ClientSession:
+        return self._session
+
+    @property
+    def logged_in(self) -> bool:
+        return self._logged_in
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every successful login."""
+        return self._generation
 
     async def _fetch_login_page(self) -> str:
         """Fetch the login page to get VIEWSTATE, etc."""
         try:
-            resp = await self._session.get(LOGIN_URL)
+            resp = await self._session.get(self.login_url)
             resp.raise_for_status()
             text = await resp.text()
             return text
@@ -44,32 +276,47 @@ class MyBusStopApi:
             raise MyBusStopAuthError(f"Error fetching login page: {err}") from err
 
     @staticmethod
-    def _extract_hidden_value(name: str, html: str) -> Optional[str]:
-        """Extract a hidden input value from the HTML."""
-        # Simple regex, good enough for this specific page structure.
-        m = re.search(
-            rf'id="{re.escape(name)}"\s+value="([^"]*)"', html, re.IGNORECASE
-        )
-        return m.group(1) if m else None
-
-    async def async_login(self) -> None:
-        """Log in to MyBusStop and establish a session."""
-        _LOGGER.debug("MyBusStop: starting login sequence")
-        html = await self._fetch_login_page()
-
-        viewstate = self._extract_hidden_value("__VIEWSTATE", html)
-        viewstate_gen = self._extract_hidden_value("__VIEWSTATEGENERATOR", html)
-        event_validation = self._extract_hidden_value("__EVENTVALIDATION", html)
-
-        if not all([viewstate, viewstate_gen, event_validation]):
+    def _extract_hidden_fields(html: str) -> Dict[str, str]:
+        """Extract every hidden input (name -> value) in a single pass."""
+        fields: Dict[str, str] = {}
+        for tag in _HIDDEN_INPUT_RE.finditer(html):
+            attrs = {k.lower(): v for k, v in _INPUT_ATTR_RE.findall(tag.group(0))}
+            name = attrs.get("name") or attrs.get("id")
+            if name:
+                fields[name] = html_lib.unescape(attrs.get("value", ""))
+        return fields
+
+    def _cached_form_tokens(self) -> Optional[Dict[str, str]]:
+        """Return the cached login form tokens if still within their TTL."""
+        if self._form_tokens is None:
+            return None
+        if time.monotonic() - self._form_tokens_at > LOGIN_TOKEN_TTL:
+            self._form_tokens = None
+            return None
+        return self._form_tokens
+
+    async def _async_fetch_form_tokens(self) -> Dict[str, str]:
+        """Download login.aspx and cache its hidden form fields."""
+        tokens = self._extract_hidden_fields(await self._fetch_login_page())
+        missing = [name for name in _REQUIRED_FORM_TOKENS if not tokens.get(name)]
+        if missing:
             raise MyBusStopAuthError("Failed to extract VIEWSTATE / EVENTVALIDATION")
+        self._form_tokens = tokens
+        self._form_tokens_at = time.monotonic()
+        return tokens
+
+    async def _async_post_login(self, tokens: Dict[str, str], strict: bool = False) -> str:
+        """POST the login form with ``tokens`` and return the response page.
 
+        A response that still shows the login form is a rejection. With
+        ``strict`` (cached tokens) the logged-in marker ``hiddenUser`` must
+        also be present, as a stale form is answered with a re-rendered
+        login page rather than an error.
+        """
         data = {
+            **tokens,
             "__EVENTTARGET": "",
             "__EVENTARGUMENT": "",
-            "__VIEWSTATE": viewstate,
-            "__VIEWSTATEGENERATOR": viewstate_gen,
-            "__EVENTVALIDATION": event_validation,
             "txtUserName": self._username,
             "txtPassword": self._password,
             "cmdLogin": "Log in",
@@ -81,21 +328,137 @@ class MyBusStopApi:
         }
 
         try:
-            resp = await self._session.post(LOGIN_URL, data=data, headers=headers)
+            resp = await self._session.post(self.login_url, data=data, headers=headers)
             resp.raise_for_status()
             text = await resp.text()
         except ClientError as err:
             raise MyBusStopAuthError(f"Login POST failed: {err}") from err
 
+        if _LOGIN_FORM_RE.search(text) or (strict and "hiddenUser" not in text):
+            _LOGGER.debug("Login response still shows the login form")
+            raise MyBusStopAuthError("MyBusStop login was rejected")
         # Very naive success check: we expect to be redirected to Index.aspx
         if "hiddenUser" not in text and "MyBusStop" not in text:
             _LOGGER.debug("Login response did not look like logged-in page")
             raise MyBusStopAuthError("MyBusStop login appears to have failed")
+        return text
+
+    async def _async_login(self) -> str:
+        """Log in to MyBusStop and return the logged-in page.
+
+        Cached form tokens are tried first (one round-trip); the login page
+        is only downloaded again if there are none or the server rejects them.
+        """
+        _LOGGER.debug("MyBusStop: starting login sequence")
+        if self._generation:
+            self.metrics.relogins += 1
+        start = time.monotonic()
+        try:
+            text = await self._async_login_sequence()
+        except Exception:
+            self.metrics.endpoint("login").record(time.monotonic() - start, error=True)
+            raise
+        self.metrics.endpoint("login").record(time.monotonic() - start, len(text))
 
         _LOGGER.info("MyBusStop login successful")
         self._logged_in = True
-        # Save last logged-in page HTML for callers who want to parse routes
-        self._last_login_page = text
+        self._generation += 1
+        return text
+
+    async def _async_login_sequence(self) -> str:
+        """Post the login form and return the logged-in page."""
+        self._logged_in = False
+
+        text: Optional[str] = None
+        tokens = self._cached_form_tokens()
+        if tokens is not None:
+            try:
+                text = await self._async_post_login(tokens, strict=True)
+            except MyBusStopAuthError as err:
+                _LOGGER.debug("Cached login form tokens rejected (%s), refetching", err)
+                self._form_tokens = None
+
+        if text is None:
+            tokens = await self._async_fetch_form_tokens()
+            text = await self._async_post_login(tokens)
+        return text
+
+    async def async_login(self, generation: Optional[int] = None) -> Optional[str]:
+        """Log in, joining a login that is already in flight.
+
+        Returns the logged-in page (Index.aspx), which route discovery can
+        parse instead of fetching it again; the page is not kept. If
+        ``generation`` is given and a newer login has completed since the
+        caller observed it, the session is already fresh, nothing is sent
+        and None is returned.
+        """
+        if (
+            generation is not None
+            and self._logged_in
+            and generation != self._generation
+        ):
+            return None
+
+        if self._login_task is None:
+            task = asyncio.ensure_future(self._async_login())
+            self._login_task = task
+
+            def _clear(_: asyncio.Future) -> None:
+                if self._login_task is task:
+                    self._login_task = None
+
+            task.add_done_callback(_clear)
+
+        return await asyncio.shield(self._login_task)
+
+    def restore_session(self) -> None:
+        """Treat cookies restored into the session as a valid login.
+
+        Nothing is sent; if the session has expired, the first request that
+        fails re-logs in through the usual path.
+        """
+        self._logged_in = True
+
+    async def async_ensure_logged_in(self) -> None:
+        """Log in unless a valid session already exists."""
+        if not self._logged_in:
+            await self.async_login()
+
+
+class MyBusStopApi:
+    """Simple client for MyBusStop WebForms API."""
+
+    def __init__(
+        self,
+        session: ClientSession,
+        username: str,
+        password: str,
+        route_id: Optional[int] = None,
+        auth: Optional[MyBusStopAuth] = None,
+    ) -> None:
+        self._session = session
+        self._route_id = route_id
+        self._auth = auth or MyBusStopAuth(session, username, password)
+        # Raw body of the last getCurrentNEW response and what it parsed to
+        self._last_body: Optional[bytes] = None
+        self._last_result: Optional[BusPosition] = None
+
+    @property
+    def auth(self) -> MyBusStopAuth:
+        return self._auth
+
+    @property
+    def metrics(self) -> ApiMetrics:
+        """Request metrics of the account (shared by all its route clients)."""
+        return self._auth.metrics
+
+    @property
+    def _logged_in(self) -> bool:
+        return self._auth.logged_in
+
+    async def async_login(self) -> None:
+        """Log in to MyBusStop and establish a session."""
+        await self._auth.async_login()
 
     async def async_get_routes(self) -> list[dict]:
         """Return list of available routes from the logged-in page.
@@ -103,96 +466,173 @@ class MyBusStopApi:
         Each route is a dict:{"id": <route_id>, "name": <route_name>}.
         If no routes are found, returns an empty list.
         """
-        if not getattr(self, "_logged_in", False):
-            await self.async_login()
+        circuit = self._auth.circuit
+        if not circuit.allow_request():
+            _LOGGER.debug("Requests paused after repeated failures, skipping route discovery")
+            return []
+        try:
+            routes = await self._async_get_routes()
+        except BaseException:
+            circuit.record_failure()
+            raise
+        if routes is None:
+            circuit.record_failure()
+            return []
+        circuit.record_success()
+        _LOGGER.info("Discovered %d route(s) from MyBusStop", len(routes))
+        return routes
 
-        # Try to use saved login page HTML if available; otherwise fetch the page
-        html = getattr(self, "_last_login_page", None)
-        if html is None:
-            # Fetch the index page which contains the route dropdown
-            index_url = LOGIN_URL.replace("login.aspx?ReturnUrl=%2fLogin%2fIndex.aspx", "Login/Index.aspx")
+    async def _async_get_routes(self) -> Optional[list[dict]]:
+        """Return the routes, or None if the routes page could not be fetched."""
+        # A login made for this discovery returns Index.aspx, which holds the
+        # route dropdown; otherwise stream that page
+        html = None if self._auth.logged_in else await self._auth.async_login()
+        parser = RouteOptionParser()
+        if html is not None:
+            _LOGGER.debug("Using login page HTML (length: %d bytes)", len(html))
+            parser.feed(html)
+            del html
+        else:
+            generation = self._auth.generation
             try:
-                resp = await self._session.get(index_url)
-                resp.raise_for_status()
-                html = await resp.text()
-                _LOGGER.debug("Fetched Index.aspx page (length: %d bytes)", len(html))
+                final_url = await self._async_stream_into(self._auth.index_url, parser)
+                if "login.aspx" in final_url.lower():
+                    # Session expired and we were redirected to the login page
+                    _LOGGER.debug("Routes page redirected to login, logging in again")
+                    self.metrics.retries += 1
+                    html = await self._auth.async_login(generation)
+                    parser = RouteOptionParser()
+                    if html is not None:
+                        parser.feed(html)
+                        del html
+                    else:
+                        await self._async_stream_into(self._auth.index_url, parser)
             except ClientError as err:
                 _LOGGER.error("Failed to fetch routes page: %s", err)
-                return []
-        else:
-            _LOGGER.debug("Using saved login page HTML (length: %d bytes)", len(html))
-
-        # Log a sample of the HTML to help debug
-        _LOGGER.debug("HTML sample (first 1000 chars): %s", html[:1000])
-
-        # Parse <option value="12345">Route Name</option>
-        # Also try to find select/dropdown elements for debugging
-        select_matches = re.findall(r'<select[^>]*>(.*?)</select>', html, re.IGNORECASE | re.DOTALL)
-        _LOGGER.debug("Found %d <select> elements in HTML", len(select_matches))
-        
-        routes = []
-        for m in re.finditer(r'<option[^>]*value="(\d+)"[^>]*>([^<]+)</option>', html, re.IGNORECASE):
-            rid = m.group(1)
-            name = m.group(2).strip()
-            # Skip empty or "Select" placeholder options
-            if name.lower() in ["", "select", "-- select --", "please select"]:
-                continue
-            try:
-                routes.append({"id": int(rid), "name": name})
-                _LOGGER.debug("Found route: id=%s, name=%s", rid, name)
-            except ValueError:
-                _LOGGER.warning("Could not parse route id '%s' as integer", rid)
-                continue
+                return None
 
-        _LOGGER.info("Discovered %d route(s) from MyBusStop", len(routes))
-        return routes
+        return parser.routes
 
-    async def async_get_current(self) -> Optional[Dict[str, Any]]:
-        """Call getCurrentNEW and return parsed data, or None if route is not active."""
-        if not self._logged_in:
-            await self.async_login()
+    async def _async_stream_into(self, url: str, parser: "RouteOptionParser") -> str:
+        """GET ``url`` and feed it to ``parser`` chunk by chunk until it is done.
+
+        Returns the final URL after redirects.
+        """
+        start = time.monotonic()
+        received = 0
+        error = True
+        try:
+            resp = await self._session.get(url)
+            try:
+                resp.raise_for_status()
+                decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="replace")
+                async for chunk in resp.content.iter_chunked(_STREAM_CHUNK_SIZE):
+                    received += len(chunk)
+                    parser.feed(decoder.decode(chunk))
+                    if parser.done:
+                        _LOGGER.debug("Route list complete after %d bytes, closing early", received)
+                        resp.close()
+                        error = False
+                        return str(resp.url)
+                parser.feed(decoder.decode(b"", final=True))
+                _LOGGER.debug("Read full routes page (%d bytes)", received)
+                error = False
+                return str(resp.url)
+            finally:
+                resp.release()
+        finally:
+            self.metrics.endpoint("routes").record(time.monotonic() - start, received, error)
+
+    async def _async_post_current(self, payload: dict, headers: dict) -> bytes:
+        """POST to getCurrentNEW and return the raw response body."""
+        start = time.monotonic()
+        try:
+            resp = await self._session.post(self._auth.current_url, json=payload, headers=headers)
+            resp.raise_for_status()
+            if "json" not in resp.content_type:
+                # An expired session gets the login page instead of JSON
+                resp.release()
+                raise ContentTypeError(
+                    resp.request_info,
+                    resp.history,
+                    status=resp.status,
+                    message=f"Unexpected content type {resp.content_type}",
+                    headers=resp.headers,
+                )
+            body = await resp.read()
+        except ClientError:
+            self.metrics.endpoint("current").record(time.monotonic() - start, error=True)
+            raise
+        self.metrics.endpoint("current").record(time.monotonic() - start, len(body))
+        return body
+
+    async def async_get_current(self) -> Optional[BusPosition]:
+        """Call getCurrentNEW and return parsed data, or None if route is not active.
+
+        Raises MyBusStopCircuitOpenError without sending anything while the
+        account's circuit breaker is open.
+        """
+        circuit = self._auth.circuit
+        if not circuit.allow_request():
+            raise MyBusStopCircuitOpenError("MyBusStop requests are paused after repeated failures")
+        try:
+            result = await self._async_get_current()
+        except BaseException:
+            # Includes cancellation by the poll timeout, so a hanging server
+            # opens the circuit and a timed-out probe is released.
+            circuit.record_failure()
+            raise
+        circuit.record_success()
+        return result
+
+    async def _async_get_current(self) -> Optional[BusPosition]:
+        await self._auth.async_ensure_logged_in()
+        generation = self._auth.generation
 
         payload = {"route_detail_id": self._route_id}
 
         headers = {
             "Content-Type": "application/json; charset=UTF-8",
             "X-Requested-With": "XMLHttpRequest",
-            "Referer": LOGIN_URL.replace("login.aspx?ReturnUrl=%2fLogin%2fIndex.aspx", "Login/Index.aspx"),
-            "Origin": "https://www.mybusstop.ca",
+            "Referer": self._auth.index_url,
+            "Origin": self._auth.base_url,
             "User-Agent": "HomeAssistant-MyBusStop/0.1",
         }
 
         try:
-            resp = await self._session.post(CURRENT_URL, json=payload, headers=headers)
-            resp.raise_for_status()
-            data = await resp.json()
+            body = await self._async_post_current(payload, headers)
         except ClientError as err:
             _LOGGER.warning("Error calling getCurrentNEW: %s", err)
-            # Try re-login once
-            self._logged_in = False
-            await self.async_login()
+            # Try re-login once; concurrent failures share a single login
+            self.metrics.retries += 1
+            await self._auth.async_login(generation)
             try:
-                resp = await self._session.post(CURRENT_URL, json=payload, headers=headers)
-                resp.raise_for_status()
-                data = await resp.json()
+                body = await self._async_post_current(payload, headers)
             except ClientError as err2:
                 raise MyBusStopApiError(f"Failed to call getCurrentNEW: {err2}") from err2
 
+        if body == self._last_body:
+            # Same bytes as last time (parked or inactive bus): return the
+            # same object, so callers can skip everything downstream with an
+            # identity check.
+            self.metrics.unchanged += 1
+            if self._last_result is None:
+                self.metrics.not_active += 1
+            return self._last_result
+
+        result = self._parse_current(json.loads(body))
+        self._last_body = body
+        self._last_result = result
+        return result
+
+    def _parse_current(self, data: Any) -> Optional[BusPosition]:
+        """Turn a decoded getCurrentNEW response into a BusPosition."""
         if "d" not in data or not isinstance(data["d"], list) or len(data["d"]) < 6:
             _LOGGER.debug("Unexpected getCurrentNEW response (route may not be active): %s", data)
+            self.metrics.not_active += 1
             return None  # Route not active/no data available
 
         d = data["d"]
-        def _to_float(val: Any) -> Optional[float]:
-            try:
-                if val is None:
-                    return None
-                s = str(val).strip()
-                if s == "" or s.lower() == "null":
-                    return None
-                return float(s)
-            except (ValueError, TypeError):
-                return None
         # Based on the page JS OnSuccessCurrent:
         # response[0] = sUnit (bus number)
         # response[1] = checkin_time
@@ -200,13 +640,16 @@ class MyBusStopApi:
         # response[3] = lat
         # response[4] = long
         # response[5] = time
-        result = {
-            "bus_number": d[0],
-            "checkin_time": d[1],
-            "timezone_offset": d[2],
-            "latitude": _to_float(d[3]),
-            "longitude": _to_float(d[4]),
-            "last_seen": d[5],
-        }
+        tz = _parse_offset(d[2])
+        result = BusPosition(
+            bus_number=d[0],
+            checkin_time=d[1],
+            timezone_offset=d[2],
+            latitude=_to_float(d[3]),
+            longitude=_to_float(d[4]),
+            last_seen=d[5],
+            checkin_ts=_parse_timestamp(d[1], tz),
+            last_seen_ts=_parse_timestamp(d[5], tz),
+        )
         _LOGGER.debug("Route %s: async_get_current returned: %s", self._route_id, result)
         return result
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestBudget:
+    """Global requests-per-second budget with fair per-account queuing.
+
+    A token bucket refills at ``rate`` tokens per second (holding at most
+    ``burst``). Callers that find it empty wait in their account's FIFO
+    queue; freed tokens go round-robin to the accounts with waiters, so one
+    account with many routes cannot starve another.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._rate = rate
+        self._burst = max(1.0, burst if burst is not None else rate)
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def waiting(self, account: Optional[str] = None) -> int:
+        """Number of queued callers, for one account or in total."""
+        if account is not None:
+            return len(self._queues.get(account, ()))
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, account: str) -> None:
+        """Wait until ``account`` may send one request."""
+        self._refill()
+        if not self._queues and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(account, deque()).append(future)
+        if self._wakeup is None:
+            self._dispatch()
+        await future
+
+    def _dispatch(self) -> None:
+        """Hand out available tokens round-robin, then schedule the next round."""
+        self._wakeup = None
+        self._refill()
+        while self._queues and self._tokens >= 1:
+            account, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                # Next turn goes to the following account
+                self._queues.move_to_end(account)
+            else:
+                del self._queues[account]
+            if future.done():  # cancelled while waiting, e.g. a poll timeout
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+        if self._queues and self._wakeup is None:
+            delay = (1 - self._tokens) / self._rate
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def cancel(self) -> None:
+        """Cancel every waiter (e.g. when the last entry unloads)."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        for queue in self._queues.values():
+            for future in queue:
+                future.cancel()
+        self._queues.clear()
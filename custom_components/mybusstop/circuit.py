@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .const import CIRCUIT_BASE_DELAY, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_MAX_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Account-level circuit breaker with jittered exponential backoff.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are refused for a backoff delay that doubles on every reopen
+    (capped at ``max_delay``, with equal jitter). When the delay has passed,
+    a single probe request is let through: success closes the circuit,
+    failure opens it again with a longer delay.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        base_delay: float = CIRCUIT_BASE_DELAY,
+        max_delay: float = CIRCUIT_MAX_DELAY,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._clock = clock
+        self.state = STATE_CLOSED
+        self.failures = 0  # consecutive failures
+        self.opened = 0  # times opened since the last close
+        self._open_until = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == STATE_CLOSED
+
+    @property
+    def retry_in(self) -> Optional[float]:
+        """Seconds until the next probe is allowed, or None if not open."""
+        if self.state != STATE_OPEN:
+            return None
+        return max(0.0, self._open_until - self._clock())
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN:
+            if self._clock() < self._open_until:
+                return False
+            self.state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            return False
+        _LOGGER.debug("Circuit half-open, sending a probe request")
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("MyBusStop is reachable again, resuming polling")
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or (
+            self.state == STATE_CLOSED and self.failures >= self._failure_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        delay = min(self._max_delay, self._base_delay * 2**self.opened)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        if self.state == STATE_CLOSED:
+            _LOGGER.warning(
+                "MyBusStop requests failing (%d in a row), pausing for %.0fs",
+                self.failures,
+                delay,
+            )
+        else:
+            _LOGGER.debug("Probe failed, pausing for %.0fs", delay)
+        self.state = STATE_OPEN
+        self.opened += 1
+        self._open_until = self._clock() + delay
+        self._probe_in_flight = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        retry_in = self.retry_in
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened,
+            "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+        }
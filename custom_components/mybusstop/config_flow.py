@@ -13,9 +13,37 @@ from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .const import (
     DOMAIN,
     CONF_DISCOVERY_TIME,
+    CONF_MAX_CONCURRENT_POLLS,
+    CONF_POLL_TIMEOUT,
+    CONF_MIN_REFRESH_AGE,
+    CONF_MORNING_PICKUP_TIME,
+    CONF_AFTERNOON_DROPOFF_TIME,
+    CONF_FRIDAY_DROPOFF_TIME,
+    CONF_ACTIVE_SCAN_INTERVAL,
+    CONF_INACTIVE_SCAN_INTERVAL,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_STOP_LATITUDE,
+    CONF_STOP_LONGITUDE,
+    CONF_PER_ROUTE_ENTITIES,
+    CONF_FIRE_UPDATE_EVENT,
+    ACTIVE_SCAN_INTERVAL,
+    INACTIVE_SCAN_INTERVAL,
+    IDLE_SCAN_INTERVAL,
     DEFAULT_DISCOVERY_TIME,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_MIN_REFRESH_AGE,
+    DEFAULT_PER_ROUTE_ENTITIES,
+    DEFAULT_FIRE_UPDATE_EVENT,
 )
 from .api import MyBusStopApi, MyBusStopAuthError
+from .schedule import parse_time
+
+_BUS_TIME_KEYS = (
+    CONF_MORNING_PICKUP_TIME,
+    CONF_AFTERNOON_DROPOFF_TIME,
+    CONF_FRIDAY_DROPOFF_TIME,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -82,11 +110,21 @@ class MyBusStopOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
         """Manage the options."""
-        if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+        errors: Dict[str, str] = {}
 
+        if user_input is not None:
+            for key in _BUS_TIME_KEYS:
+                try:
+                    parse_time(user_input.get(key))
+                except ValueError:
+                    errors[key] = "invalid_time"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
         return self.async_show_form(
             step_id="init",
+            errors=errors,
             data_schema=vol.Schema(
                 {
                     vol.Required(
@@ -95,6 +133,59 @@ class MyBusStopOptionsFlow(config_entries.OptionsFlow):
                             CONF_DISCOVERY_TIME, DEFAULT_DISCOVERY_TIME
                         ),
                     ): str,
+                    vol.Required(
+                        CONF_MAX_CONCURRENT_POLLS,
+                        default=self.config_entry.options.get(
+                            CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+                    vol.Required(
+                        CONF_POLL_TIMEOUT,
+                        default=self.config_entry.options.get(
+                            CONF_POLL_TIMEOUT, DEFAULT_POLL_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+                    vol.Required(
+                        CONF_MIN_REFRESH_AGE,
+                        default=self.config_entry.options.get(
+                            CONF_MIN_REFRESH_AGE, DEFAULT_MIN_REFRESH_AGE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    **{
+                        vol.Optional(
+                            key,
+                            description={"suggested_value": options.get(key, "")},
+                        ): str
+                        for key in _BUS_TIME_KEYS
+                    },
+                    vol.Required(
+                        CONF_ACTIVE_SCAN_INTERVAL,
+                        default=options.get(CONF_ACTIVE_SCAN_INTERVAL, ACTIVE_SCAN_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                    vol.Required(
+                        CONF_INACTIVE_SCAN_INTERVAL,
+                        default=options.get(CONF_INACTIVE_SCAN_INTERVAL, INACTIVE_SCAN_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                    vol.Required(
+                        CONF_IDLE_SCAN_INTERVAL,
+                        default=options.get(CONF_IDLE_SCAN_INTERVAL, IDLE_SCAN_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                    vol.Optional(
+                        CONF_STOP_LATITUDE,
+                        description={"suggested_value": options.get(CONF_STOP_LATITUDE)},
+                    ): vol.All(vol.Coerce(float), vol.Range(min=-90, max=90)),
+                    vol.Optional(
+                        CONF_STOP_LONGITUDE,
+                        description={"suggested_value": options.get(CONF_STOP_LONGITUDE)},
+                    ): vol.All(vol.Coerce(float), vol.Range(min=-180, max=180)),
+                    vol.Required(
+                        CONF_PER_ROUTE_ENTITIES,
+                        default=options.get(CONF_PER_ROUTE_ENTITIES, DEFAULT_PER_ROUTE_ENTITIES),
+                    ): bool,
+                    vol.Required(
+                        CONF_FIRE_UPDATE_EVENT,
+                        default=options.get(CONF_FIRE_UPDATE_EVENT, DEFAULT_FIRE_UPDATE_EVENT),
+                    ): bool,
                 }
             ),
         )
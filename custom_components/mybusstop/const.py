@@ -1,18 +1,76 @@
 DOMAIN = "mybusstop"
+# hass.data key of the domain-wide poller (hass.data[DOMAIN] holds entries)
+DATA_DOMAIN_POLLER = f"{DOMAIN}_poller"
+# Dispatcher signal for one route's new data; format with (entry_id, route_id)
+SIGNAL_ROUTE_UPDATE = f"{DOMAIN}_update_{{}}_{{}}"
+# Dispatcher signal for an entry's aggregate entities; format with (entry_id)
+SIGNAL_ENTRY_UPDATE = f"{DOMAIN}_entry_update_{{}}"
 
 CONF_ROUTE_ID = "route_id"
 CONF_MORNING_PICKUP_TIME = "morning_pickup_time"
 CONF_AFTERNOON_DROPOFF_TIME = "afternoon_dropoff_time"
 CONF_FRIDAY_DROPOFF_TIME = "friday_dropoff_time"
 CONF_DISCOVERY_TIME = "discovery_time"
+CONF_MAX_CONCURRENT_POLLS = "max_concurrent_polls"
+CONF_POLL_TIMEOUT = "poll_timeout"
+CONF_MIN_REFRESH_AGE = "min_refresh_age"
+CONF_ACTIVE_SCAN_INTERVAL = "active_scan_interval"
+CONF_INACTIVE_SCAN_INTERVAL = "inactive_scan_interval"
+CONF_IDLE_SCAN_INTERVAL = "idle_scan_interval"
+CONF_STOP_LATITUDE = "stop_latitude"
+CONF_STOP_LONGITUDE = "stop_longitude"
+CONF_PER_ROUTE_ENTITIES = "per_route_entities"
+CONF_FIRE_UPDATE_EVENT = "fire_update_event"
 
 DEFAULT_DISCOVERY_TIME = "02:00"  # 2:00 AM default
+DEFAULT_MAX_CONCURRENT_POLLS = 4  # routes polled at the same time
+DEFAULT_POLL_TIMEOUT = 15  # seconds, per route
+DEFAULT_MIN_REFRESH_AGE = 0  # seconds; 0 always polls on a service call
+DEFAULT_PER_ROUTE_ENTITIES = False  # one sensor and tracker per route
+DEFAULT_FIRE_UPDATE_EVENT = False  # public mybusstop_update event after each refresh
 
 DEFAULT_SCAN_INTERVAL = 60  # seconds
 POLLING_WINDOW_MINUTES = 15  # Start polling 15 minutes before and after scheduled times
 ACTIVE_SCAN_INTERVAL = 60  # seconds, when actively polling around bus times
-INACTIVE_SCAN_INTERVAL = 3600  # 1 hour, when not near bus times
+INACTIVE_SCAN_INTERVAL = 3600  # 1 hour, when not near bus times (0 disables)
+IDLE_SCAN_INTERVAL = 300  # seconds, for a stationary or inactive route near bus times
+REQUESTS_PER_SECOND = 10  # getCurrentNEW polls per second across all accounts
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive failures before polling pauses
+CIRCUIT_BASE_DELAY = 30  # seconds of the first pause; doubles on every reopen
+CIRCUIT_MAX_DELAY = 1800
+LOGIN_TOKEN_TTL = 3600  # seconds to reuse login.aspx form tokens before refetching
+HISTORY_SIZE = 720  # positions kept per route (12 hours at one poll per minute)
+HISTORY_MAX_AGE = 6 * 3600  # seconds; older positions are evicted
+ETA_ARRIVAL_RADIUS = 100  # metres from the stop that count as arrived
+ETA_SPEED_ALPHA = 0.5  # smoothing of the live approach rate
+ETA_PROFILE_ALPHA = 0.1  # smoothing of the learned per-route approach rate
+ETA_STALE_AFTER = 600  # seconds without a new point before the ETA is unavailable
+ETA_REFRESH_INTERVAL = 60  # seconds between re-evaluations of an ageing ETA
+GEOFENCE_CELL_SIZE = 0.01  # degrees per geofence grid cell (about 1 km)
+MOTION_STILL_RADIUS = 30  # metres a bus may drift and still count as standing...
+MOTION_STILL_AFTER = 180  # ...for this many seconds before it is stationary
+MOTION_MOVE_RADIUS = 75  # metres a stationary bus must move to count as moving again
+MOTION_DUE_SLACK = 5  # seconds early a route may be polled on a scheduler tick
+UPDATE_DEBOUNCE = 0.05  # seconds route results are gathered into one aggregate write
+ROUTE_REMOVAL_GRACE = 14 * 24 * 3600  # seconds a route may be missing from discovery
+ROUTE_STALE_AFTER = 1800  # seconds since last_seen before a route counts as inactive
+ROUTE_STATUS_REFRESH_INTERVAL = 60  # seconds between re-checks of route activity
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # seconds
+
+ATTR_MAX_AGE = "max_age"
+ATTR_NAME = "name"
+ATTR_LATITUDE = "latitude"
+ATTR_LONGITUDE = "longitude"
+ATTR_RADIUS = "radius"
+ATTR_ROUTE_ID = "route_id"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
 
 BASE_URL = "https://www.mybusstop.ca"
-LOGIN_URL = f"{BASE_URL}/login.aspx?ReturnUrl=%2fLogin%2fIndex.aspx"
-CURRENT_URL = f"{BASE_URL}/Login/Index.aspx/getCurrentNEW"
+LOGIN_PATH = "/login.aspx?ReturnUrl=%2fLogin%2fIndex.aspx"
+INDEX_PATH = "/Login/Index.aspx"
+CURRENT_PATH = f"{INDEX_PATH}/getCurrentNEW"
+LOGIN_URL = f"{BASE_URL}{LOGIN_PATH}"
+INDEX_URL = f"{BASE_URL}{INDEX_PATH}"
+CURRENT_URL = f"{BASE_URL}{CURRENT_PATH}"
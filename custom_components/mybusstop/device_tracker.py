@@ -1,68 +1,70 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
 
-from homeassistant.components.device_tracker import TrackerEntity
+from homeassistant.components.device_tracker import (
+    DOMAIN as DEVICE_TRACKER_DOMAIN,
+    TrackerEntity,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_PER_ROUTE_ENTITIES,
+    DEFAULT_PER_ROUTE_ENTITIES,
+)
+from .entity import (
+    MyBusStopAggregateEntity,
+    MyBusStopRouteEntity,
+    async_remove_route_entities,
+)
+from .registry import RouteRegistry
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def _find_most_recent_route_data(all_data: Dict[int, Dict[str, Any]]) -> Optional[tuple[int, Dict[str, Any]]]:
-    """Find the route with the most recent last_seen timestamp."""
-    if not all_data:
-        _LOGGER.debug("_find_most_recent_route_data: all_data is empty")
-        return None
-    
-    _LOGGER.debug("_find_most_recent_route_data: checking %d routes: %s", len(all_data), list(all_data.keys()))
-    
-    most_recent = None
-    most_recent_route_id = None
-    
-    for route_id, data in all_data.items():
-        last_seen = data.get("last_seen")
-        _LOGGER.debug("Route %s: last_seen=%s, data keys=%s", route_id, last_seen, list(data.keys()))
-        if not last_seen:
-            continue
-        
-        if most_recent is None or last_seen > most_recent:
-            most_recent = last_seen
-            most_recent_route_id = route_id
-    
-    if most_recent_route_id is not None:
-        _LOGGER.debug("Selected route %s with last_seen=%s", most_recent_route_id, most_recent)
-        return most_recent_route_id, all_data[most_recent_route_id]
-    
-    _LOGGER.warning("No route with valid last_seen found. Routes data: %s", all_data)
-    return None
-
-
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     data = hass.data[DOMAIN][entry.entry_id]
-    routes = data.get("routes", [])
+    registry = data["registry"]
 
     entities = [
         MyBusStopBusTracker(
             hass=hass,
             entry_id=entry.entry_id,
-            routes=routes,
+            registry=registry,
         ),
     ]
 
+    if entry.options.get(CONF_PER_ROUTE_ENTITIES, DEFAULT_PER_ROUTE_ENTITIES):
+        entities.extend(
+            MyBusStopRouteTracker(hass, entry.entry_id, registry, route_id)
+            for route_id in registry
+        )
+
+        @callback
+        def _async_routes_changed(added: set[int], removed: set[int]) -> None:
+            """Add trackers for routes found by discovery."""
+            if added:
+                async_add_entities(
+                    MyBusStopRouteTracker(hass, entry.entry_id, registry, route_id)
+                    for route_id in added
+                )
+
+        entry.async_on_unload(registry.async_add_listener(_async_routes_changed))
+    else:
+        async_remove_route_entities(hass, entry.entry_id, DEVICE_TRACKER_DOMAIN)
+
     async_add_entities(entities)
 
 
-class MyBusStopBusTracker(TrackerEntity):
+class MyBusStopBusTracker(MyBusStopAggregateEntity, TrackerEntity):
     """Device tracker for the active bus across all routes."""
     _attr_source_type = "gps"
 
@@ -70,89 +72,99 @@ class MyBusStopBusTracker(TrackerEntity):
         self,
         hass: HomeAssistant,
         entry_id: str,
-        routes: list,
+        registry: RouteRegistry,
     ) -> None:
-        self.hass = hass
-        self._entry_id = entry_id
-        self._routes = routes
+        super().__init__(hass, entry_id, registry)
         self._attr_unique_id = f"{entry_id}_bus_tracker"
         self._attr_name = "MyBusStop Bus"
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
-        result = _find_most_recent_route_data(all_data)
-        is_available = result is not None and result[1].get("latitude") is not None
-        if not is_available:
-            _LOGGER.debug("%s: Entity unavailable, result=%s, data=%s", self._attr_unique_id, result, all_data)
-        return is_available
+        result = self._route_data.active
+        return result is not None and result[1].latitude is not None
 
     @property
     def latitude(self) -> float | None:
         """Return latitude from most recent route."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
-        result = _find_most_recent_route_data(all_data)
+        result = self._route_data.active
         if result:
             _, data = result
-            return data.get("latitude")
+            return data.latitude
         return None
 
     @property
     def longitude(self) -> float | None:
         """Return longitude from most recent route."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
-        result = _find_most_recent_route_data(all_data)
+        result = self._route_data.active
         if result:
             _, data = result
-            return data.get("longitude")
+            return data.longitude
         return None
 
     @property
     def extra_state_attributes(self) -> dict:
         """Return attributes including current route."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
-        result = _find_most_recent_route_data(all_data)
+        result = self._route_data.active
         
         if not result:
             return {}
         
         route_id, data = result
         
-        # Find route name
-        route_name = None
-        for r in self._routes:
-            if int(r["id"]) == route_id:
-                route_name = r.get("name", f"Route {route_id}")
-                break
-        
         return {
             "current_route_id": route_id,
-            "current_route_name": route_name or f"Route {route_id}",
-            "bus_number": data.get("bus_number"),
-            "checkin_time": data.get("checkin_time"),
-            "last_seen": data.get("last_seen"),
-            "timezone_offset": data.get("timezone_offset"),
+            "current_route_name": self._registry.name(route_id),
+            "bus_number": data.bus_number,
+            "checkin_time": data.checkin_time,
+            "last_seen": data.last_seen,
+            "timezone_offset": data.timezone_offset,
+            "stale": self._stale,
         }
 
+
+class MyBusStopRouteTracker(MyBusStopRouteEntity, TrackerEntity):
+    """Device tracker for the bus of a single route."""
+    _attr_source_type = "gps"
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        registry: RouteRegistry,
+        route_id: int,
+    ) -> None:
+        super().__init__(hass, entry_id, registry, route_id)
+        self._attr_unique_id = f"{entry_id}_route_{route_id}_tracker"
+
     @property
-    def device_info(self):
-        from homeassistant.helpers.entity import DeviceInfo
-        return DeviceInfo(
-            identifiers={(DOMAIN, "mybusstop_device")},
-            name="MyBusStop",
-            manufacturer="MyBusStop",
-        )
+    def available(self) -> bool:
+        """Return if entity is available."""
+        position = self._position
+        return position is not None and position.latitude is not None
 
-    async def async_added_to_hass(self) -> None:
-        """Register event listener when entity is added."""
-        self.async_on_remove(
-            self.hass.bus.async_listen(
-                f"{DOMAIN}_update",
-                self._handle_update_event,
-            )
-        )
+    @property
+    def latitude(self) -> float | None:
+        position = self._position
+        return position.latitude if position else None
 
-    async def _handle_update_event(self, event) -> None:
-        """Handle update event from service."""
-        self.async_write_ha_state()
+    @property
+    def longitude(self) -> float | None:
+        position = self._position
+        return position.longitude if position else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return attributes of the route's bus."""
+        position = self._position
+        if not position:
+            return {}
+        return {
+            "route_id": self._route_id,
+            "route_name": self._registry.name(self._route_id),
+            "bus_number": position.bus_number,
+            "checkin_time": position.checkin_time,
+            "last_seen": position.last_seen,
+            "timezone_offset": position.timezone_offset,
+            "stale": self._stale,
+        }
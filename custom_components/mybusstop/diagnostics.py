@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_STOP_LATITUDE, CONF_STOP_LONGITUDE, DATA_DOMAIN_POLLER, DOMAIN
+
+TO_REDACT = {"username", "password", CONF_STOP_LATITUDE, CONF_STOP_LONGITUDE}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a MyBusStop config entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+    poller = entry_data.get("poller")
+    auth = entry_data.get("auth")
+    domain_poller = hass.data.get(DATA_DOMAIN_POLLER)
+    route_data = entry_data.get("data", {})
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "timings": {
+            **entry_data.get("timings", {}),
+            "last_refresh_seconds": (
+                round(poller.last_refresh_duration, 3)
+                if poller is not None and poller.last_refresh_duration is not None
+                else None
+            ),
+        },
+        "routes": {
+            "count": len(entry_data.get("registry", ())),
+            "registry_version": getattr(entry_data.get("registry"), "version", None),
+            "with_data": len(route_data),
+            "active_route_id": getattr(route_data, "active_route_id", None),
+        },
+        "geofences": len(getattr(entry_data.get("geofences"), "index", ())),
+        "motion": entry_data["motion"].as_dict() if "motion" in entry_data else None,
+        "api": auth.metrics.as_dict() if auth is not None else None,
+        "circuit": auth.circuit.as_dict() if auth is not None else None,
+        "request_budget": (
+            {
+                "requests_per_second": domain_poller.budget.rate,
+                "loaded_entries": len(domain_poller),
+                "waiting": domain_poller.budget.waiting(),
+                "waiting_for_entry": domain_poller.budget.waiting(entry.entry_id),
+            }
+            if domain_poller is not None
+            else None
+        ),
+    }
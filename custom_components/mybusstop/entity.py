@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import DeviceInfo, Entity
+
+from .const import DOMAIN, SIGNAL_ENTRY_UPDATE, SIGNAL_ROUTE_UPDATE
+from .models import BusPosition
+from .registry import RouteRegistry
+from .route_data import MyBusStopRouteData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_remove_route_entities(hass: HomeAssistant, entry_id: str, domain: str) -> None:
+    """Remove a platform's per-route entities, left over from when they were enabled."""
+    entity_registry = er.async_get(hass)
+    prefix = f"{entry_id}_route_"
+    for entity_entry in er.async_entries_for_config_entry(entity_registry, entry_id):
+        if entity_entry.domain == domain and entity_entry.unique_id.startswith(prefix):
+            _LOGGER.debug("Per-route entities disabled, removing %s", entity_entry.entity_id)
+            entity_registry.async_remove(entity_entry.entity_id)
+
+
+class MyBusStopEntity(Entity):
+    """Base for every MyBusStop entity of a config entry.
+
+    Entities are pushed to by the poller and only write state when the
+    fingerprint of what they render changed.
+    """
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, registry: RouteRegistry) -> None:
+        self.hass = hass
+        self._entry_id = entry_id
+        self._registry = registry
+        self._last_fingerprint: Optional[tuple] = None
+
+    @property
+    def _route_data(self) -> MyBusStopRouteData:
+        return self.hass.data[DOMAIN][self._entry_id]["data"]
+
+    @property
+    def _stale(self) -> bool:
+        """True while polling is paused and the last-known data is shown."""
+        return not self.hass.data[DOMAIN][self._entry_id]["auth"].circuit.is_closed
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, "mybusstop_device")},
+            name="MyBusStop",
+            manufacturer="MyBusStop",
+        )
+
+    def _inputs_fingerprint(self) -> Optional[tuple]:
+        """Return a fingerprint of the data this entity renders."""
+        raise NotImplementedError
+
+    @callback
+    def _async_write_if_changed(self) -> None:
+        """Write state if the fingerprint changed since the last write."""
+        fingerprint = self._inputs_fingerprint()
+        if fingerprint == self._last_fingerprint:
+            return
+        self._last_fingerprint = fingerprint
+        self.async_write_ha_state()
+
+
+class MyBusStopAggregateEntity(MyBusStopEntity):
+    """Base for entities that summarise all routes of an entry.
+
+    Updates arrive on the entry's debounced dispatcher signal. By default
+    the entity renders the active route (most recently seen bus).
+    """
+
+    def _inputs_fingerprint(self) -> Optional[tuple]:
+        route_data = self._route_data
+        route_id = route_data.active_route_id
+        if route_id is None:
+            return None
+        return (
+            route_id,
+            route_data.fingerprint(route_id),
+            self._registry.version,
+            self._stale,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Register update listener when entity is added."""
+        self._last_fingerprint = self._inputs_fingerprint()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_ENTRY_UPDATE.format(self._entry_id),
+                self._handle_update,
+            )
+        )
+
+    @callback
+    def _handle_update(self, changed_routes: list[int], stale_changed: bool) -> None:
+        """Handle a poll update, skipping unchanged inputs."""
+        if not changed_routes and not stale_changed:
+            return
+        self._async_write_if_changed()
+
+
+class MyBusStopRouteEntity(MyBusStopEntity):
+    """Base for entities that show a single route.
+
+    Updates arrive on the route's own dispatcher signal, so a poll result
+    only wakes the entities of the route that changed. The entity removes
+    itself when its route is retired from the registry.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        registry: RouteRegistry,
+        route_id: int,
+    ) -> None:
+        super().__init__(hass, entry_id, registry)
+        self._route_id = route_id
+
+    @property
+    def name(self) -> str:
+        """Follow renames of the route."""
+        return f"MyBusStop {self._registry.name(self._route_id)}"
+
+    @property
+    def _position(self) -> Optional[BusPosition]:
+        return self._route_data.get(self._route_id)
+
+    def _inputs_fingerprint(self) -> tuple:
+        return (
+            self._route_data.fingerprint(self._route_id),
+            self._registry.name(self._route_id),
+            self._stale,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for this route's updates and for its removal."""
+        self._last_fingerprint = self._inputs_fingerprint()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_ROUTE_UPDATE.format(self._entry_id, self._route_id),
+                self._async_write_if_changed,
+            )
+        )
+        self.async_on_remove(
+            self._registry.async_add_listener(self._handle_routes_changed)
+        )
+
+    @callback
+    def _handle_routes_changed(self, added: set[int], removed: set[int]) -> None:
+        """Remove the entity with its route; pick up renames."""
+        if self._route_id not in removed:
+            self._async_write_if_changed()
+            return
+        _LOGGER.debug("Route %s removed, removing %s", self._route_id, self.entity_id)
+        if self.registry_entry is not None:
+            er.async_get(self.hass).async_remove(self.entity_id)
+        else:
+            self.hass.async_create_task(self.async_remove(force_remove=True))
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from .const import (
+    ETA_ARRIVAL_RADIUS,
+    ETA_PROFILE_ALPHA,
+    ETA_SPEED_ALPHA,
+    ETA_STALE_AFTER,
+)
+from .history import PositionHistory
+from .models import BusPosition
+
+_LOGGER = logging.getLogger(__name__)
+
+_EARTH_RADIUS_M = 6_371_000.0
+# Approach rates below this (m/s) count as not approaching the stop
+_MIN_APPROACH_RATE = 0.5
+# Samples needed before the short-term rate is fully trusted
+_WARMUP_SAMPLES = 4
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres between two points."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+
+def haversine_many(
+    lats: Iterable[float], lons: Iterable[float], lat: float, lon: float
+) -> list[float]:
+    """Distances in metres from each ``(lats[i], lons[i])`` to ``(lat, lon)``.
+
+    Works directly on PositionHistory window views; the target's trig terms
+    are computed once for the whole batch.
+    """
+    phi2 = math.radians(lat)
+    cos_phi2 = math.cos(phi2)
+    lmb2 = math.radians(lon)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    out = []
+    for lat1, lon1 in zip(lats, lons):
+        phi1 = radians(lat1)
+        a = sin((phi2 - phi1) / 2) ** 2 + cos(phi1) * cos_phi2 * sin((lmb2 - radians(lon1)) / 2) ** 2
+        out.append(2 * _EARTH_RADIUS_M * asin(sqrt(min(1.0, a))))
+    return out
+
+
+@dataclass(frozen=True, slots=True)
+class EtaEstimate:
+    """Estimated arrival of a route's bus at the configured stop."""
+
+    route_id: int
+    minutes: Optional[float]
+    confidence: float
+    distance_m: float
+    approach_rate: Optional[float]  # m/s towards the stop
+    timestamp: float  # last_seen_ts the estimate is based on
+
+
+class RouteEtaState:
+    """Incremental ETA state for one route: O(1) work per new point."""
+
+    __slots__ = ("last_ts", "last_distance", "rate", "samples", "profile_rate", "profile_samples")
+
+    def __init__(self) -> None:
+        self.last_ts: Optional[float] = None
+        self.last_distance: Optional[float] = None
+        self.rate: Optional[float] = None  # short-term EWMA approach rate
+        self.samples = 0
+        # Learned per-route approach rate, kept across trips
+        self.profile_rate: Optional[float] = None
+        self.profile_samples = 0
+
+    def update(self, timestamp: float, distance: float) -> None:
+        """Fold in one new point at ``distance`` metres from the stop."""
+        if self.last_ts is not None and timestamp <= self.last_ts:
+            return
+        if self.last_ts is not None and timestamp - self.last_ts > ETA_STALE_AFTER:
+            # Gap too long to derive a speed from; start a new trip
+            self.rate = None
+            self.samples = 0
+        elif self.last_ts is not None:
+            step = (self.last_distance - distance) / (timestamp - self.last_ts)
+            self.rate = step if self.rate is None else (
+                ETA_SPEED_ALPHA * step + (1 - ETA_SPEED_ALPHA) * self.rate
+            )
+            self.samples += 1
+            if step >= _MIN_APPROACH_RATE:
+                self.profile_rate = step if self.profile_rate is None else (
+                    ETA_PROFILE_ALPHA * step + (1 - ETA_PROFILE_ALPHA) * self.profile_rate
+                )
+                self.profile_samples += 1
+        self.last_ts = timestamp
+        self.last_distance = distance
+
+
+class EtaEngine:
+    """Estimate minutes until each route's bus reaches a stop."""
+
+    def __init__(self, stop_latitude: float, stop_longitude: float) -> None:
+        self.stop_latitude = stop_latitude
+        self.stop_longitude = stop_longitude
+        self._states: Dict[int, RouteEtaState] = {}
+
+    def async_update(
+        self,
+        route_id: int,
+        position: BusPosition,
+        history: Optional[PositionHistory] = None,
+    ) -> None:
+        """Feed a new poll result for a route.
+
+        The first time a route is seen, its recent ``history`` (if given) is
+        folded in as one batch; afterwards only the new point is processed.
+        """
+        if position.last_seen_ts is None or not position.has_location:
+            return
+        state = self._states.get(route_id)
+        if state is None:
+            state = self._states[route_id] = RouteEtaState()
+        if state.last_ts is None and history is not None:
+            self._seed(state, history)
+        distance = haversine_m(
+            position.latitude, position.longitude, self.stop_latitude, self.stop_longitude
+        )
+        state.update(position.last_seen_ts, distance)
+
+    def _seed(self, state: RouteEtaState, history: PositionHistory) -> None:
+        """Warm a new route's state from its most recent history points."""
+        for timestamps, lats, lons in history.window(last=_WARMUP_SAMPLES + 1):
+            distances = haversine_many(lats, lons, self.stop_latitude, self.stop_longitude)
+            for timestamp, distance in zip(timestamps, distances):
+                state.update(timestamp, distance)
+
+    def async_remove(self, route_id: int) -> None:
+        self._states.pop(route_id, None)
+
+    def export_profiles(self) -> Dict[str, list]:
+        """Return learned approach rates as JSON-serialisable data."""
+        return {
+            str(route_id): [state.profile_rate, state.profile_samples]
+            for route_id, state in self._states.items()
+            if state.profile_rate is not None
+        }
+
+    def restore_profiles(self, profiles: Dict[str, list]) -> None:
+        """Load approach rates saved by :meth:`export_profiles`."""
+        for route_id, (rate, samples) in profiles.items():
+            state = self._states.setdefault(int(route_id), RouteEtaState())
+            state.profile_rate = float(rate)
+            state.profile_samples = int(samples)
+
+    def estimate(self, route_id: int, now: float) -> Optional[EtaEstimate]:
+        """Return the current estimate for a route.
+
+        None without data, or once the last point is more than
+        ``ETA_STALE_AFTER`` seconds old.
+        """
+        state = self._states.get(route_id)
+        if state is None or state.last_ts is None or now - state.last_ts > ETA_STALE_AFTER:
+            return None
+
+        distance = state.last_distance
+        if distance <= ETA_ARRIVAL_RADIUS:
+            return EtaEstimate(route_id, 0.0, 1.0, distance, state.rate, state.last_ts)
+
+        # Blend the live rate with the learned profile; trust live data more
+        # as samples accumulate.
+        live = state.rate if state.rate is not None and state.rate >= _MIN_APPROACH_RATE else None
+        weight = min(1.0, state.samples / _WARMUP_SAMPLES) if live is not None else 0.0
+        profile = state.profile_rate
+        if live is not None and profile is not None:
+            rate = weight * live + (1 - weight) * profile
+        else:
+            rate = live if live is not None else profile
+        if rate is None:
+            return EtaEstimate(route_id, None, 0.0, distance, state.rate, state.last_ts)
+
+        # Confidence: enough samples, fresh data, live and learned rates agree
+        age = max(0.0, now - state.last_ts)
+        freshness = max(0.0, 1.0 - age / ETA_STALE_AFTER)
+        history = min(1.0, (state.samples + state.profile_samples) / (2 * _WARMUP_SAMPLES))
+        if live is not None and profile is not None:
+            agreement = min(live, profile) / max(live, profile)
+        else:
+            agreement = 0.5
+        confidence = round(freshness * history * agreement, 2)
+
+        return EtaEstimate(
+            route_id,
+            round(distance / rate / 60, 1),
+            confidence,
+            distance,
+            state.rate,
+            state.last_ts,
+        )
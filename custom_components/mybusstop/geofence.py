@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from .const import GEOFENCE_CELL_SIZE
+from .eta import haversine_m
+
+_LOGGER = logging.getLogger(__name__)
+
+_METRES_PER_DEGREE = 111_320.0
+
+EVENT_ENTER = "enter"
+EVENT_EXIT = "exit"
+
+# (route_id, name): fences of different routes may share a name
+GeofenceKey = tuple[Optional[int], str]
+
+
+def _by_name(key: GeofenceKey) -> tuple[str, int]:
+    """Sort key ordering fences by name, the all-routes fence first."""
+    route_id, name = key
+    return name, -1 if route_id is None else route_id
+
+
+@dataclass(frozen=True, slots=True)
+class Geofence:
+    """A named circle; ``route_id`` None applies it to every route."""
+
+    name: str
+    latitude: float
+    longitude: float
+    radius: float  # metres
+    route_id: Optional[int] = None
+
+    @property
+    def key(self) -> GeofenceKey:
+        return self.route_id, self.name
+
+    def applies_to(self, route_id: int) -> bool:
+        return self.route_id is None or self.route_id == route_id
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class GeofenceIndex:
+    """Uniform grid over lat/lon for finding fences near a point.
+
+    Each fence is registered in every cell its bounding box touches, so a
+    lookup only checks the fences in the point's own cell instead of all of
+    them. Fences are keyed by ``(route_id, name)``.
+    """
+
+    def __init__(self, cell_size: float = GEOFENCE_CELL_SIZE) -> None:
+        self._cell_size = cell_size
+        self._cells: Dict[tuple[int, int], set[GeofenceKey]] = {}
+        self._fences: Dict[GeofenceKey, Geofence] = {}
+
+    def __len__(self) -> int:
+        return len(self._fences)
+
+    def __iter__(self) -> Iterator[Geofence]:
+        return iter(self._fences.values())
+
+    def get(self, key: GeofenceKey) -> Optional[Geofence]:
+        return self._fences.get(key)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (
+            math.floor(latitude / self._cell_size),
+            math.floor(longitude / self._cell_size),
+        )
+
+    def _cells_for(self, fence: Geofence) -> Iterator[tuple[int, int]]:
+        dlat = fence.radius / _METRES_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(fence.latitude)), 1e-6)
+        dlon = min(180.0, fence.radius / (_METRES_PER_DEGREE * cos_lat))
+        lat_lo, lon_lo = self._cell(fence.latitude - dlat, fence.longitude - dlon)
+        lat_hi, lon_hi = self._cell(fence.latitude + dlat, fence.longitude + dlon)
+        for lat_cell in range(lat_lo, lat_hi + 1):
+            for lon_cell in range(lon_lo, lon_hi + 1):
+                yield lat_cell, lon_cell
+
+    def add(self, fence: Geofence) -> None:
+        """Add a fence, replacing the fence with the same name and route."""
+        key = fence.key
+        self.remove(key)
+        self._fences[key] = fence
+        for cell in self._cells_for(fence):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: GeofenceKey) -> Optional[Geofence]:
+        """Remove a fence by key; returns it, or None if unknown."""
+        fence = self._fences.pop(key, None)
+        if fence is None:
+            return None
+        for cell in self._cells_for(fence):
+            keys = self._cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._cells[cell]
+        return fence
+
+    def containing(
+        self, latitude: float, longitude: float, route_id: Optional[int] = None
+    ) -> set[GeofenceKey]:
+        """Return the keys of fences that contain the point."""
+        keys = self._cells.get(self._cell(latitude, longitude))
+        if not keys:
+            return set()
+        inside = set()
+        for key in keys:
+            fence = self._fences[key]
+            if route_id is not None and not fence.applies_to(route_id):
+                continue
+            if haversine_m(latitude, longitude, fence.latitude, fence.longitude) <= fence.radius:
+                inside.add(key)
+        return inside
+
+
+class GeofenceEngine:
+    """Track which fences each route's bus is in and report crossings."""
+
+    def __init__(self, fences: Iterable[Geofence] = ()) -> None:
+        self.index = GeofenceIndex()
+        self._inside: Dict[int, set[GeofenceKey]] = {}
+        self._last_point: Dict[int, tuple[float, float]] = {}
+        for fence in fences:
+            self.index.add(fence)
+
+    def async_update(
+        self, route_id: int, latitude: float, longitude: float
+    ) -> list[tuple[str, Geofence]]:
+        """Record a new point; returns ``(event, fence)`` for each crossing."""
+        self._last_point[route_id] = (latitude, longitude)
+        now_inside = self.index.containing(latitude, longitude, route_id)
+        was_inside = self._inside.get(route_id, set())
+        if now_inside == was_inside:
+            return []
+        self._inside[route_id] = now_inside
+        # Exits before enters, so automations see the bus leave one fence
+        # before it enters the next.
+        crossings = [
+            (EVENT_EXIT, fence)
+            for key in sorted(was_inside - now_inside, key=_by_name)
+            if (fence := self.index.get(key)) is not None
+        ]
+        crossings.extend(
+            (EVENT_ENTER, self.index.get(key))
+            for key in sorted(now_inside - was_inside, key=_by_name)
+        )
+        return crossings
+
+    def async_prime(self, route_id: int, latitude: float, longitude: float) -> None:
+        """Set a route's fences from a known point without reporting crossings."""
+        self._last_point[route_id] = (latitude, longitude)
+        self._inside[route_id] = self.index.containing(latitude, longitude, route_id)
+
+    def async_add(self, fence: Geofence) -> None:
+        """Add or replace a fence; current membership is updated silently."""
+        self.index.add(fence)
+        self._reevaluate(fence.key)
+
+    def async_remove(self, name: str, route_id: Optional[int] = None) -> bool:
+        """Remove a fence; returns False if none matched.
+
+        With ``route_id`` only that route's fence of the given name is
+        removed, otherwise every fence of that name.
+        """
+        if route_id is not None:
+            keys = [(route_id, name)]
+        else:
+            keys = [fence.key for fence in self.index if fence.name == name]
+        removed = False
+        for key in keys:
+            if self.index.remove(key) is None:
+                continue
+            removed = True
+            for inside in self._inside.values():
+                inside.discard(key)
+        return removed
+
+    def async_remove_route(self, route_id: int) -> None:
+        self._inside.pop(route_id, None)
+        self._last_point.pop(route_id, None)
+
+    def _reevaluate(self, key: GeofenceKey) -> None:
+        fence = self.index.get(key)
+        for route_id, (latitude, longitude) in self._last_point.items():
+            inside = self._inside.setdefault(route_id, set())
+            if fence.applies_to(route_id) and (
+                haversine_m(latitude, longitude, fence.latitude, fence.longitude)
+                <= fence.radius
+            ):
+                inside.add(key)
+            else:
+                inside.discard(key)
+
+    def as_list(self) -> list[dict]:
+        """Return the fences as a JSON-serialisable list."""
+        return [fence.as_dict() for fence in self.index]
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from array import array
+from typing import Iterator, Optional
+
+from .const import HISTORY_MAX_AGE, HISTORY_SIZE
+
+# (timestamps, latitudes, longitudes) views over one contiguous stretch
+HistorySegment = tuple[memoryview, memoryview, memoryview]
+
+
+class PositionHistory:
+    """Fixed-capacity ring buffer of ``(timestamp, lat, lon)`` for one route.
+
+    Backed by three preallocated ``array('d')`` buffers, so memory stays flat
+    however long Home Assistant runs. Appends are O(1); points older than
+    ``max_age`` seconds (relative to the newest point) are evicted, and the
+    oldest point is overwritten once the buffer is full.
+    """
+
+    __slots__ = ("_ts", "_lat", "_lon", "_capacity", "_max_age", "_start", "_len")
+
+    def __init__(self, capacity: int = HISTORY_SIZE, max_age: float = HISTORY_MAX_AGE) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._capacity = capacity
+        self._max_age = max_age
+        self._ts = array("d", bytes(8 * capacity))
+        self._lat = array("d", bytes(8 * capacity))
+        self._lon = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def _slot(self, index: int) -> int:
+        """Map a logical index (0 = oldest) to a buffer slot."""
+        return (self._start + index) % self._capacity
+
+    def append(self, timestamp: float, latitude: float, longitude: float) -> bool:
+        """Add a point; returns False if it is not newer than the latest one."""
+        if self._len and timestamp <= self._ts[self._slot(self._len - 1)]:
+            return False
+
+        if self._len == self._capacity:
+            # Overwrite the oldest point
+            self._start = (self._start + 1) % self._capacity
+            self._len -= 1
+        slot = self._slot(self._len)
+        self._ts[slot] = timestamp
+        self._lat[slot] = latitude
+        self._lon[slot] = longitude
+        self._len += 1
+        self.evict_older_than(timestamp - self._max_age)
+        return True
+
+    def evict_older_than(self, cutoff: float) -> int:
+        """Drop points with a timestamp before ``cutoff``; returns the count."""
+        dropped = 0
+        while self._len and self._ts[self._start] < cutoff:
+            self._start = (self._start + 1) % self._capacity
+            self._len -= 1
+            dropped += 1
+        return dropped
+
+    def clear(self) -> None:
+        self._start = 0
+        self._len = 0
+
+    def _index_since(self, since: float) -> int:
+        """Return the logical index of the first point at or after ``since``."""
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts[self._slot(mid)] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(
+        self, since: Optional[float] = None, last: Optional[int] = None
+    ) -> list[HistorySegment]:
+        """Return views over a window of points, oldest first, without copying.
+
+        ``since`` keeps points at or after that timestamp; ``last`` keeps at
+        most the newest ``last`` points. The result has one segment, or two
+        when the window wraps around the end of the buffer. The views are only
+        valid until the next append.
+        """
+        first = 0 if since is None else self._index_since(since)
+        if last is not None:
+            first = max(first, self._len - last)
+        count = self._len - first
+        if count <= 0:
+            return []
+
+        begin = self._slot(first)
+        end = begin + count
+        ts, lat, lon = memoryview(self._ts), memoryview(self._lat), memoryview(self._lon)
+        if end <= self._capacity:
+            return [(ts[begin:end], lat[begin:end], lon[begin:end])]
+        end -= self._capacity
+        return [
+            (ts[begin:], lat[begin:], lon[begin:]),
+            (ts[:end], lat[:end], lon[:end]),
+        ]
+
+    def __iter__(self) -> Iterator[tuple[float, float, float]]:
+        """Iterate over all points, oldest first."""
+        for ts, lat, lon in self.window():
+            yield from zip(ts, lat, lon)
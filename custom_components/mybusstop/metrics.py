@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Dict, Optional
+
+# Upper bounds of the latency buckets, in milliseconds; the last bucket is open.
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; O(log buckets) per observation."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of its bucket (ms)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return float(min(bound, self.max))
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": _round(self.mean),
+            "min_ms": _round(self.min),
+            "max_ms": _round(self.max),
+            "p50_ms": _round(self.quantile(0.5)),
+            "p95_ms": _round(self.quantile(0.95)),
+            "buckets_ms": dict(zip(labels, self.counts)),
+        }
+
+
+class EndpointMetrics:
+    """Requests, errors, latency and response sizes of one endpoint."""
+
+    __slots__ = ("requests", "errors", "latency", "bytes_total", "bytes_max")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.bytes_total = 0
+        self.bytes_max = 0
+
+    def record(self, seconds: float, size: Optional[int] = None, error: bool = False) -> None:
+        self.requests += 1
+        self.latency.observe(seconds)
+        if error:
+            self.errors += 1
+        if size is not None:
+            self.bytes_total += size
+            self.bytes_max = max(self.bytes_max, size)
+
+    def as_dict(self) -> Dict[str, Any]:
+        sized = self.requests - self.errors
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency": self.latency.as_dict(),
+            "bytes_total": self.bytes_total,
+            "bytes_mean": round(self.bytes_total / sized) if sized > 0 else None,
+            "bytes_max": self.bytes_max,
+        }
+
+
+class ApiMetrics:
+    """Counters for one MyBusStop account, shared by all of its route clients.
+
+    Endpoints are ``login``, ``routes`` and ``current`` (getCurrentNEW).
+    """
+
+    def __init__(self) -> None:
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self.retries = 0
+        self.relogins = 0
+        self.not_active = 0
+        self.unchanged = 0  # getCurrentNEW bodies identical to the previous one
+
+    @property
+    def unchanged_rate(self) -> Optional[float]:
+        """Share of successful getCurrentNEW polls that returned unchanged bytes."""
+        current = self.endpoints.get("current")
+        polls = current.requests - current.errors if current is not None else 0
+        return round(self.unchanged / polls, 3) if polls else None
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "endpoints": {name: m.as_dict() for name, m in self.endpoints.items()},
+            "retries": self.retries,
+            "relogins": self.relogins,
+            "not_active": self.not_active,
+            "unchanged": self.unchanged,
+            "unchanged_rate": self.unchanged_rate,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
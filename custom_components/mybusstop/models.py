@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class BusPosition:
+    """One getCurrentNEW result for a route.
+
+    Immutable and hashable, so equality and ``hash()`` double as a cheap
+    change check. ``last_seen`` / ``checkin_time`` keep the strings sent by
+    MyBusStop for display; the ``*_ts`` fields are parsed epoch seconds.
+    """
+
+    bus_number: Any
+    checkin_time: Optional[str]
+    timezone_offset: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    last_seen: Optional[str]
+    checkin_ts: Optional[float] = None
+    last_seen_ts: Optional[float] = None
+
+    @property
+    def has_location(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the position as a plain dict (built on demand)."""
+        return {
+            "bus_number": self.bus_number,
+            "checkin_time": self.checkin_time,
+            "timezone_offset": self.timezone_offset,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "last_seen": self.last_seen,
+            "checkin_ts": self.checkin_ts,
+            "last_seen_ts": self.last_seen_ts,
+        }
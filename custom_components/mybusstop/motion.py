@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+from .const import (
+    ACTIVE_SCAN_INTERVAL,
+    IDLE_SCAN_INTERVAL,
+    MOTION_DUE_SLACK,
+    MOTION_MOVE_RADIUS,
+    MOTION_STILL_AFTER,
+    MOTION_STILL_RADIUS,
+)
+from .eta import haversine_m
+from .models import BusPosition
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RouteMotion:
+    """Movement of one route's bus, from consecutive poll results."""
+
+    __slots__ = (
+        "moving",
+        "speed",
+        "displacement",
+        "last_poll",
+        "_latitude",
+        "_longitude",
+        "_anchor",
+        "_still_since",
+    )
+
+    def __init__(self) -> None:
+        self.moving = True  # unknown buses are polled at the short interval
+        self.speed: Optional[float] = None  # m/s between the last two polls
+        self.displacement: Optional[float] = None  # metres between the last two polls
+        self.last_poll: Optional[float] = None
+        self._latitude: Optional[float] = None
+        self._longitude: Optional[float] = None
+        # Where the bus was when it last stopped moving, and since when
+        self._anchor: Optional[tuple[float, float]] = None
+        self._still_since: Optional[float] = None
+
+    def update(self, position: Optional[BusPosition], now: float) -> bool:
+        """Record a poll result; returns True if the bus started or stopped moving.
+
+        Stopping needs ``MOTION_STILL_AFTER`` seconds within
+        ``MOTION_STILL_RADIUS`` of one point; starting again needs
+        ``MOTION_MOVE_RADIUS`` from that point. The gap between the two
+        radii keeps GPS jitter from flipping the state on every poll.
+        """
+        previous_poll, self.last_poll = self.last_poll, now
+        if position is None or not position.has_location:
+            # Route not running: nothing to follow until it reports again
+            self.speed = self.displacement = None
+            self._latitude = self._longitude = self._anchor = self._still_since = None
+            return self._set_moving(False)
+
+        latitude, longitude = position.latitude, position.longitude
+        if self._latitude is not None and previous_poll is not None:
+            self.displacement = haversine_m(self._latitude, self._longitude, latitude, longitude)
+            elapsed = now - previous_poll
+            self.speed = self.displacement / elapsed if elapsed > 0 else None
+        self._latitude, self._longitude = latitude, longitude
+
+        if self._anchor is None:
+            self._anchor, self._still_since = (latitude, longitude), now
+            # First fix after being inactive: poll fast until it proves still
+            return self._set_moving(True)
+
+        from_anchor = haversine_m(self._anchor[0], self._anchor[1], latitude, longitude)
+        if self.moving:
+            if from_anchor > MOTION_STILL_RADIUS:
+                self._anchor, self._still_since = (latitude, longitude), now
+                return False
+            return self._set_moving(now - self._still_since < MOTION_STILL_AFTER)
+        if from_anchor > MOTION_MOVE_RADIUS:
+            self._anchor, self._still_since = (latitude, longitude), now
+            return self._set_moving(True)
+        return False
+
+    def _set_moving(self, moving: bool) -> bool:
+        changed = moving != self.moving
+        self.moving = moving
+        return changed
+
+
+class PollPacer:
+    """Per-route poll intervals driven by whether each bus is moving.
+
+    Moving buses (and routes not polled yet) are due every
+    ``moving_interval`` seconds; stationary and inactive ones every
+    ``idle_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        moving_interval: float = ACTIVE_SCAN_INTERVAL,
+        idle_interval: float = IDLE_SCAN_INTERVAL,
+    ) -> None:
+        self.moving_interval = moving_interval
+        self.idle_interval = max(moving_interval, idle_interval)
+        self._routes: Dict[int, RouteMotion] = {}
+
+    def get(self, route_id: int) -> Optional[RouteMotion]:
+        return self._routes.get(route_id)
+
+    def interval(self, route_id: int) -> float:
+        """Seconds between polls of a route in its current state."""
+        motion = self._routes.get(route_id)
+        if motion is None or motion.moving:
+            return self.moving_interval
+        return self.idle_interval
+
+    def is_due(self, route_id: int, now: float) -> bool:
+        """Return True if the route should be polled at ``now``."""
+        motion = self._routes.get(route_id)
+        if motion is None or motion.last_poll is None:
+            return True
+        return now - motion.last_poll + MOTION_DUE_SLACK >= self.interval(route_id)
+
+    def async_update(self, route_id: int, position: Optional[BusPosition], now: float) -> None:
+        """Record a route's poll result (None when the route is not running)."""
+        motion = self._routes.get(route_id)
+        if motion is None:
+            motion = self._routes[route_id] = RouteMotion()
+        if motion.update(position, now):
+            _LOGGER.debug(
+                "Route %s %s, polling every %.0fs",
+                route_id,
+                "moving" if motion.moving else "stationary or inactive",
+                self.interval(route_id),
+            )
+
+    def async_remove(self, route_id: int) -> None:
+        self._routes.pop(route_id, None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "moving_interval": self.moving_interval,
+            "idle_interval": self.idle_interval,
+            "routes": {
+                str(route_id): {
+                    "moving": motion.moving,
+                    "speed": round(motion.speed, 2) if motion.speed is not None else None,
+                    "displacement_m": (
+                        round(motion.displacement) if motion.displacement is not None else None
+                    ),
+                }
+                for route_id, motion in self._routes.items()
+            },
+        }
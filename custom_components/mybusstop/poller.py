@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .api import MyBusStopApi, MyBusStopCircuitOpenError
+from .budget import RequestBudget
+from .const import (
+    DOMAIN,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DEFAULT_MIN_REFRESH_AGE,
+    DEFAULT_POLL_TIMEOUT,
+    REQUESTS_PER_SECOND,
+    SIGNAL_ENTRY_UPDATE,
+    SIGNAL_ROUTE_UPDATE,
+    UPDATE_DEBOUNCE,
+)
+from .models import BusPosition
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MyBusStopPoller:
+    """Poll every route of a config entry concurrently.
+
+    Each route's entities are signalled as soon as its result is stored.
+    The entry's aggregate entities get one signal per ``UPDATE_DEBOUNCE``
+    window, carrying every route that changed in it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT_POLLS,
+        timeout: float = DEFAULT_POLL_TIMEOUT,
+        budget: Optional[RequestBudget] = None,
+        min_refresh_age: float = DEFAULT_MIN_REFRESH_AGE,
+        fire_event: bool = False,
+    ) -> None:
+        self.hass = hass
+        self._entry_id = entry_id
+        self._max_concurrent = max(1, int(max_concurrent))
+        self._timeout = float(timeout)
+        self._budget = budget
+        self.min_refresh_age = min_refresh_age
+        self.last_refresh_duration: Optional[float] = None
+        self._saved_generation: Optional[int] = None
+        # time.monotonic() of the last completed poll of every route; the
+        # max_age check relies on it, so partial refreshes leave it alone
+        self.last_refresh: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_paced = False
+        self._refresh_routes: Optional[frozenset[int]] = None
+        self._shutdown = False
+        self._stale = False
+        self._fire_event = fire_event  # public mybusstop_update event after each refresh
+        self._pending_routes: set[int] = set()
+        self._pending_stale_changed = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def _entry_data(self) -> Dict[str, Any]:
+        return self.hass.data[DOMAIN][self._entry_id]
+
+    @property
+    def route_ids(self) -> set[int]:
+        """Routes this poller can poll."""
+        apis = self._entry_data["apis"]
+        return {route_key for route_key in self._entry_data["registry"] if route_key in apis}
+
+    async def _async_poll_route(
+        self, semaphore: asyncio.Semaphore, route_key: int, api: MyBusStopApi
+    ) -> bool:
+        """Poll a single route and store its result.
+
+        Returns True if the stored data for the route changed.
+        """
+        async with semaphore:
+            # Wait for the shared request budget outside the timeout; a
+            # paused account (circuit open) sends nothing, so needs no slot.
+            if self._budget is not None and not api.auth.circuit.retry_in:
+                await self._budget.acquire(self._entry_id)
+            try:
+                position = await asyncio.wait_for(api.async_get_current(), self._timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.warning(
+                    "Route %s: no response within %.1fs, keeping previous data",
+                    route_key,
+                    self._timeout,
+                )
+                return False
+            except MyBusStopCircuitOpenError:
+                _LOGGER.debug("Route %s: requests paused, keeping previous data", route_key)
+                return False
+            except Exception as err:
+                _LOGGER.error("Failed to update route %s: %s", route_key, err)
+                return False
+
+        entry_data = self._entry_data
+        entry_data["motion"].async_update(route_key, position, time.monotonic())
+        if position is None:
+            _LOGGER.debug("Route %s: No data available (route may not be running)", route_key)
+            return False
+
+        if not entry_data["data"].async_set(route_key, position):
+            _LOGGER.debug("Route %s: data unchanged", route_key)
+            return False
+        entry_data["eta"].async_update(
+            route_key, position, entry_data["data"].history(route_key)
+        )
+        if position.has_location:
+            self._fire_geofence_events(route_key, position)
+        _LOGGER.debug("Updated route %s with new data", route_key)
+        async_dispatcher_send(self.hass, SIGNAL_ROUTE_UPDATE.format(self._entry_id, route_key))
+        self._async_schedule_update(route_key)
+        return True
+
+    @callback
+    def _async_schedule_update(
+        self, route_key: Optional[int] = None, stale_changed: bool = False
+    ) -> None:
+        """Queue an aggregate update; results within the window share one signal."""
+        if route_key is not None:
+            self._pending_routes.add(route_key)
+        self._pending_stale_changed |= stale_changed
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                UPDATE_DEBOUNCE, self._async_flush_update
+            )
+
+    @callback
+    def _async_flush_update(self) -> None:
+        """Signal the entry's aggregate entities with the queued changes."""
+        self._flush_handle = None
+        changed_routes = sorted(self._pending_routes)
+        stale_changed = self._pending_stale_changed
+        self._pending_routes = set()
+        self._pending_stale_changed = False
+        async_dispatcher_send(
+            self.hass, SIGNAL_ENTRY_UPDATE.format(self._entry_id), changed_routes, stale_changed
+        )
+
+    async def async_shutdown(self) -> None:
+        """Stop polling before the entry's data goes away (on unload).
+
+        Refuses new refreshes, cancels a running one and waits for it to
+        finish, and drops a queued aggregate update.
+        """
+        self._shutdown = True
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        task = self._refresh_task
+        if task is not None:
+            task.cancel()
+            await asyncio.wait([task])
+
+    def _fire_geofence_events(self, route_key: int, position: BusPosition) -> None:
+        entry_data = self._entry_data
+        crossings = entry_data["geofences"].async_update(
+            route_key, position.latitude, position.longitude
+        )
+        for event, fence in crossings:
+            _LOGGER.debug("Route %s: %s geofence %s", route_key, event, fence.name)
+            self.hass.bus.async_fire(
+                f"{DOMAIN}_geofence",
+                {
+                    "entry_id": self._entry_id,
+                    "event": event,
+                    "zone": fence.name,
+                    "route_id": route_key,
+                    "route_name": entry_data["registry"].name(route_key),
+                    "bus_number": position.bus_number,
+                    "latitude": position.latitude,
+                    "longitude": position.longitude,
+                },
+            )
+
+    async def async_refresh(
+        self, paced: bool = False, route_ids: Optional[frozenset[int]] = None
+    ) -> None:
+        """Poll all routes, at most ``max_concurrent`` at a time, then notify entities.
+
+        A ``paced`` refresh (from the scheduler) only polls the routes that
+        are due according to their movement, see :class:`PollPacer`.
+        ``route_ids`` limits the refresh to those routes.
+        """
+        entry_data = self._entry_data
+        apis: Dict[int, MyBusStopApi] = entry_data["apis"]
+        route_keys = [
+            route_key
+            for route_key in entry_data["registry"]
+            if route_key in apis and (route_ids is None or route_key in route_ids)
+        ]
+
+        start = time.monotonic()
+        if paced:
+            pacer = entry_data["motion"]
+            due = [route_key for route_key in route_keys if pacer.is_due(route_key, start)]
+            if not due:
+                _LOGGER.debug("No route due for a poll, skipping scheduled refresh")
+                return
+            _LOGGER.debug("%d of %d route(s) due for a poll", len(due), len(route_keys))
+            route_keys = due
+        semaphore = asyncio.Semaphore(self._max_concurrent)
+        results = await asyncio.gather(
+            *(
+                self._async_poll_route(semaphore, route_key, apis[route_key])
+                for route_key in route_keys
+            )
+        )
+        changed_routes = [
+            route_key for route_key, changed in zip(route_keys, results) if changed
+        ]
+        end = time.monotonic()
+        self.last_refresh_duration = end - start
+        if not paced and route_ids is None:
+            self.last_refresh = end
+
+        # Persist new positions and any refreshed session cookies
+        generation = entry_data["auth"].generation
+        if changed_routes or generation != self._saved_generation:
+            self._saved_generation = generation
+            entry_data["storage"].async_schedule_save()
+
+        # Data is stale while requests are paused by the circuit breaker
+        stale = not entry_data["auth"].circuit.is_closed
+        stale_changed = stale != self._stale
+        self._stale = stale
+
+        # A stale flip changes every route's entities, polled this time or not
+        if stale_changed:
+            for route_key in entry_data["registry"]:
+                async_dispatcher_send(
+                    self.hass, SIGNAL_ROUTE_UPDATE.format(self._entry_id, route_key)
+                )
+
+        # Always queue an aggregate update: request metrics change on every poll
+        self._async_schedule_update(stale_changed=stale_changed)
+        if self._fire_event:
+            self.hass.bus.async_fire(
+                f"{DOMAIN}_update",
+                {
+                    "entry_id": self._entry_id,
+                    "refresh_duration": round(self.last_refresh_duration, 3),
+                    "changed_routes": changed_routes,
+                    "stale": stale,
+                    "stale_changed": stale_changed,
+                },
+            )
+        _LOGGER.debug(
+            "Bus location update completed for %d route(s) in %.3fs, %d changed",
+            len(route_keys),
+            self.last_refresh_duration,
+            len(changed_routes),
+        )
+
+    async def async_request_refresh(
+        self,
+        max_age: float = 0,
+        paced: bool = False,
+        route_ids: Optional[Iterable[int]] = None,
+    ) -> None:
+        """Refresh unless a refresh is running or the data is fresh enough.
+
+        A call that arrives while a refresh is in progress waits for that
+        refresh instead of starting another one. When ``max_age`` is set and
+        the last poll of all routes finished less than ``max_age`` seconds
+        ago, the data already stored for the entry is kept as is. ``paced``
+        polls only the routes that are due (see :meth:`async_refresh`) and
+        ``route_ids`` only the given routes; a request that the running
+        refresh does not cover runs once that refresh is done.
+        """
+        if route_ids is not None:
+            route_ids = frozenset(route_ids)
+        while self._refresh_task is not None:
+            task = self._refresh_task
+            if self._covers(paced, route_ids):
+                _LOGGER.debug("Refresh already in progress, joining it")
+                await self._async_wait(task)
+                return
+            await self._async_wait(task)
+
+        if self._shutdown:
+            return
+
+        if (
+            max_age
+            and self.last_refresh is not None
+            and time.monotonic() - self.last_refresh < max_age
+        ):
+            _LOGGER.debug(
+                "Last full poll finished %.1fs ago (max age %ss), serving existing data",
+                time.monotonic() - self.last_refresh,
+                max_age,
+            )
+            return
+
+        # A background task: Home Assistant startup does not wait for polls,
+        # and async_shutdown cancels a running one on unload
+        task = self.hass.async_create_background_task(
+            self.async_refresh(paced, route_ids), f"{DOMAIN}_refresh_{self._entry_id}"
+        )
+        self._refresh_task = task
+        self._refresh_paced = paced
+        self._refresh_routes = route_ids
+
+        def _clear(_: asyncio.Task) -> None:
+            if self._refresh_task is task:
+                self._refresh_task = None
+
+        task.add_done_callback(_clear)
+        await self._async_wait(task)
+
+    def _covers(self, paced: bool, route_ids: Optional[frozenset[int]]) -> bool:
+        """Return True if the running refresh also serves this request."""
+        if paced:
+            return True
+        if self._refresh_paced:
+            return False
+        return self._refresh_routes is None or (
+            route_ids is not None and route_ids <= self._refresh_routes
+        )
+
+    @staticmethod
+    async def _async_wait(task: asyncio.Task) -> None:
+        """Wait for a refresh; one cancelled by shutdown just ends the wait."""
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+
+
+class MyBusStopDomainPoller:
+    """Owns the pollers of every loaded config entry.
+
+    All entries share one :class:`RequestBudget`, so several accounts
+    together stay within ``REQUESTS_PER_SECOND``, with each account getting
+    a fair share of it.
+    """
+
+    def __init__(self, hass: HomeAssistant, rate: float = REQUESTS_PER_SECOND) -> None:
+        self.hass = hass
+        self.budget = RequestBudget(rate)
+        self._pollers: Dict[str, MyBusStopPoller] = {}
+
+    def __contains__(self, entry_id: object) -> bool:
+        return entry_id in self._pollers
+
+    def __len__(self) -> int:
+        return len(self._pollers)
+
+    @callback
+    def async_add_entry(self, entry_id: str, poller: MyBusStopPoller) -> CALLBACK_TYPE:
+        """Register an entry's poller; returns a callback that removes it."""
+        self._pollers[entry_id] = poller
+
+        @callback
+        def _remove() -> None:
+            if self._pollers.get(entry_id) is poller:
+                del self._pollers[entry_id]
+
+        return _remove
+
+    async def async_request_refresh(
+        self,
+        entry_ids: Optional[Iterable[str]] = None,
+        max_age: Optional[float] = None,
+        route_ids: Optional[Iterable[int]] = None,
+    ) -> None:
+        """Refresh the given entries (all loaded entries by default).
+
+        ``max_age`` overrides each entry's own minimum refresh age.
+        ``route_ids`` polls only those routes, in the entries that have them.
+        """
+        if entry_ids is None:
+            pollers = list(self._pollers.values())
+        else:
+            entry_ids = list(entry_ids)
+            unknown = [entry_id for entry_id in entry_ids if entry_id not in self._pollers]
+            if unknown:
+                raise HomeAssistantError(f"MyBusStop entry not loaded: {', '.join(unknown)}")
+            pollers = [self._pollers[entry_id] for entry_id in entry_ids]
+
+        targets: Dict[MyBusStopPoller, Optional[set[int]]] = dict.fromkeys(pollers)
+        if route_ids is not None:
+            route_ids = set(route_ids)
+            targets = {
+                poller: poller_routes
+                for poller in pollers
+                if (poller_routes := poller.route_ids & route_ids)
+            }
+            unknown = route_ids.difference(*targets.values())
+            if unknown:
+                raise HomeAssistantError(
+                    f"MyBusStop route not found: {', '.join(map(str, sorted(unknown)))}"
+                )
+
+        await asyncio.gather(
+            *(
+                poller.async_request_refresh(
+                    poller.min_refresh_age if max_age is None else max_age,
+                    route_ids=poller_routes,
+                )
+                for poller, poller_routes in targets.items()
+            )
+        )
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import logging
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+RouteListener = Callable[[set[int], set[int]], None]
+
+
+class RouteRegistry:
+    """Routes of a config entry, indexed by id.
+
+    ``version`` increases on every change. Listeners are called with
+    ``(added_ids, removed_ids)`` after each change, so entities, the poller
+    and discovery all share one view of the routes.
+    """
+
+    def __init__(self, routes: Iterable[dict] = ()) -> None:
+        self._routes: Dict[int, dict] = {}
+        self._listeners: list[RouteListener] = []
+        self.version = 0
+        for route in routes:
+            route_id = int(route["id"])
+            self._routes[route_id] = self._make_route(route_id, route.get("name"))
+            if route.get("missing_since") is not None:
+                self._routes[route_id]["missing_since"] = float(route["missing_since"])
+
+    @staticmethod
+    def _make_route(route_id: int, name: Optional[str]) -> dict:
+        return {"id": route_id, "name": name or f"Route {route_id}"}
+
+    def __contains__(self, route_id: object) -> bool:
+        return route_id in self._routes
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._routes)
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def get(self, route_id: int) -> Optional[dict]:
+        """Return ``{"id", "name"}`` for a route, or None.
+
+        Routes missing from discovery also carry ``missing_since`` (epoch).
+        """
+        return self._routes.get(route_id)
+
+    def name(self, route_id: int) -> str:
+        """Return the route's name, falling back to ``Route <id>``."""
+        route = self._routes.get(route_id)
+        return route["name"] if route else f"Route {route_id}"
+
+    def values(self) -> Iterable[dict]:
+        return self._routes.values()
+
+    def as_list(self) -> list[dict]:
+        """Return the routes as a JSON-serialisable list."""
+        return [dict(route) for route in self._routes.values()]
+
+    def as_discovered_list(self) -> list[dict]:
+        """Return ``{"id", "name"}`` of every route, as kept in the entry data."""
+        return [{"id": route["id"], "name": route["name"]} for route in self._routes.values()]
+
+    @callback
+    def async_add_listener(self, listener: RouteListener) -> CALLBACK_TYPE:
+        """Call ``listener(added, removed)`` on changes; returns an unsubscribe."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    @callback
+    def async_update(
+        self, routes: Iterable[dict], remove_missing: bool = False
+    ) -> tuple[set[int], set[int]]:
+        """Merge a discovered route list into the registry.
+
+        New routes are added and known routes renamed. Routes missing from
+        ``routes`` are removed only when ``remove_missing`` is set.
+        Returns ``(added_ids, removed_ids)``.
+        """
+        incoming = {int(r["id"]): r.get("name") for r in routes}
+        added = set(incoming) - set(self._routes)
+        removed = set(self._routes) - set(incoming) if remove_missing else set()
+        renamed = False
+
+        for route_id, name in incoming.items():
+            route = self._routes.get(route_id)
+            if route is None:
+                self._routes[route_id] = self._make_route(route_id, name)
+            elif name and route["name"] != name:
+                route["name"] = name
+                renamed = True
+        for route_id in removed:
+            del self._routes[route_id]
+
+        if added or removed or renamed:
+            self.version += 1
+            _LOGGER.debug(
+                "Routes updated (version %d): added %s, removed %s",
+                self.version,
+                sorted(added),
+                sorted(removed),
+            )
+            for listener in list(self._listeners):
+                listener(added, removed)
+        return added, removed
+
+    @callback
+    def async_apply_discovery(
+        self, routes: Iterable[dict], now: float, grace: float
+    ) -> tuple[set[int], set[int]]:
+        """Apply a discovery result in place.
+
+        New routes are added (and known ones renamed) straight away. A known
+        route missing from ``routes`` is only removed once it has been missing
+        for ``grace`` seconds, so routes that run on some days only survive.
+        An empty result is ignored, as it usually means discovery failed.
+        Returns ``(added_ids, removed_ids)``.
+        """
+        routes = list(routes)
+        if not routes:
+            return set(), set()
+        incoming = {int(route["id"]) for route in routes}
+        expired = set()
+        for route_id, route in self._routes.items():
+            if route_id in incoming:
+                route.pop("missing_since", None)
+                continue
+            missing_since = route.setdefault("missing_since", now)
+            if now - missing_since >= grace:
+                expired.add(route_id)
+        added, _ = self.async_update(routes)
+        return added, self.async_remove(expired)
+
+    @callback
+    def async_remove(self, route_ids: Iterable[int]) -> set[int]:
+        """Remove routes by id; returns the ids that were removed."""
+        removed = {route_id for route_id in route_ids if route_id in self._routes}
+        if not removed:
+            return removed
+        for route_id in removed:
+            del self._routes[route_id]
+        self.version += 1
+        for listener in list(self._listeners):
+            listener(set(), removed)
+        return removed
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional
+
+from .history import PositionHistory
+from .models import BusPosition
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def route_fingerprint(position: Optional[BusPosition]) -> Optional[int]:
+    """Return a content fingerprint for one route's poll result."""
+    if position is None:
+        return None
+    return hash(position)
+
+
+def _recency(position: BusPosition) -> Optional[tuple]:
+    """Return the key the active route is picked by, or None without last_seen.
+
+    Parsed timestamps rank above ``last_seen`` strings that could not be
+    parsed; those are compared as strings, so such a route is still shown.
+    """
+    if position.last_seen_ts is not None:
+        return 1, position.last_seen_ts, ""
+    if position.last_seen:
+        return 0, 0.0, position.last_seen
+    return None
+
+
+class MyBusStopRouteData(Mapping):
+    """Latest poll result per route, indexed by the most recently seen route.
+
+    Reads behave like a ``{route_id: BusPosition}`` dict. Writes go through
+    :meth:`async_set`, which keeps a per-route fingerprint and the active
+    route (the one with the most recent ``last_seen``) up to date, so entities
+    get the active route in O(1) instead of rescanning every route.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[int, BusPosition] = {}
+        self._fingerprints: Dict[int, Optional[int]] = {}
+        self._active_route_id: Optional[int] = None
+        self._history: Dict[int, PositionHistory] = {}
+
+    def __getitem__(self, route_id: int) -> BusPosition:
+        return self._data[route_id]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def fingerprint(self, route_id: int) -> Optional[int]:
+        """Return the stored fingerprint for a route."""
+        return self._fingerprints.get(route_id)
+
+    @property
+    def active_route_id(self) -> Optional[int]:
+        """Return the id of the route with the most recent last_seen."""
+        return self._active_route_id
+
+    @property
+    def active(self) -> Optional[tuple[int, BusPosition]]:
+        """Return ``(route_id, data)`` for the active route, or None."""
+        if self._active_route_id is None:
+            return None
+        return self._active_route_id, self._data[self._active_route_id]
+
+    def async_set(self, route_id: int, position: BusPosition) -> bool:
+        """Store a route's poll result. Returns True if it changed."""
+        previous = self._data.get(route_id)
+        if previous is position or previous == position:
+            return False
+        self._data[route_id] = position
+        self._fingerprints[route_id] = route_fingerprint(position)
+        self._update_active(route_id, _recency(previous) if previous else None)
+        if position.last_seen_ts is not None and position.has_location:
+            history = self._history.get(route_id)
+            if history is None:
+                history = self._history[route_id] = PositionHistory()
+            history.append(position.last_seen_ts, position.latitude, position.longitude)
+        return True
+
+    def history(self, route_id: int) -> Optional[PositionHistory]:
+        """Return the position history of a route, if it has any."""
+        return self._history.get(route_id)
+
+    def async_remove(self, route_id: int) -> None:
+        """Forget a route."""
+        self._data.pop(route_id, None)
+        self._fingerprints.pop(route_id, None)
+        self._history.pop(route_id, None)
+        if route_id == self._active_route_id:
+            self._reindex()
+
+    def _update_active(self, route_id: int, previous_recency: Optional[tuple]) -> None:
+        recency = _recency(self._data[route_id])
+        if route_id == self._active_route_id:
+            # The active route moved backwards or lost its timestamp; rare,
+            # so a full rescan is fine.
+            if recency is None or (
+                previous_recency is not None and recency < previous_recency
+            ):
+                self._reindex()
+            return
+        if recency is None:
+            return
+        active = self.active
+        if active is None or recency > _recency(active[1]):
+            self._active_route_id = route_id
+            _LOGGER.debug(
+                "Active route is now %s (last_seen=%s)", route_id, self._data[route_id].last_seen
+            )
+
+    def _reindex(self) -> None:
+        best_id: Optional[int] = None
+        best = None
+        for route_id, position in self._data.items():
+            recency = _recency(position)
+            if recency is not None and (best is None or recency > best):
+                best = recency
+                best_id = route_id
+        self._active_route_id = best_id
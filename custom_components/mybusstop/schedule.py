@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_MORNING_PICKUP_TIME,
+    CONF_AFTERNOON_DROPOFF_TIME,
+    CONF_FRIDAY_DROPOFF_TIME,
+    CONF_ACTIVE_SCAN_INTERVAL,
+    CONF_INACTIVE_SCAN_INTERVAL,
+    POLLING_WINDOW_MINUTES,
+    ACTIVE_SCAN_INTERVAL,
+    INACTIVE_SCAN_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_FRIDAY = 4
+_SATURDAY = 5
+
+# How far ahead to look for the next window (covers a full week plus a weekend).
+_LOOKAHEAD_DAYS = 8
+
+
+def parse_time(value: Any) -> Optional[time]:
+    """Parse an ``HH:MM`` option value, returning None when unset.
+
+    Raises ValueError for a non-empty value that is not a valid time.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    hour, minute = map(int, value.split(":"))
+    return time(hour, minute)
+
+
+class PollSchedule:
+    """Weekday-aware polling windows around configured bus times.
+
+    - Morning pickup: Monday to Friday.
+    - Afternoon dropoff: Monday to Thursday, and Friday when no Friday
+      dropoff time is configured.
+    - Friday dropoff: Friday only.
+
+    Each time opens a window of ``window`` before and after it.
+    """
+
+    def __init__(
+        self,
+        morning_pickup: Optional[time] = None,
+        afternoon_dropoff: Optional[time] = None,
+        friday_dropoff: Optional[time] = None,
+        window: timedelta = timedelta(minutes=POLLING_WINDOW_MINUTES),
+    ) -> None:
+        self.morning_pickup = morning_pickup
+        self.afternoon_dropoff = afternoon_dropoff
+        self.friday_dropoff = friday_dropoff
+        self.window = window
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> "PollSchedule":
+        """Build a schedule from config entry options."""
+        return cls(
+            morning_pickup=parse_time(options.get(CONF_MORNING_PICKUP_TIME)),
+            afternoon_dropoff=parse_time(options.get(CONF_AFTERNOON_DROPOFF_TIME)),
+            friday_dropoff=parse_time(options.get(CONF_FRIDAY_DROPOFF_TIME)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if at least one bus time is configured."""
+        return any((self.morning_pickup, self.afternoon_dropoff, self.friday_dropoff))
+
+    def times_for(self, day: date) -> list[time]:
+        """Return the bus times that apply on ``day``."""
+        weekday = day.weekday()
+        if weekday >= _SATURDAY:
+            return []
+
+        times = []
+        if self.morning_pickup:
+            times.append(self.morning_pickup)
+        if weekday == _FRIDAY and self.friday_dropoff:
+            times.append(self.friday_dropoff)
+        elif self.afternoon_dropoff:
+            times.append(self.afternoon_dropoff)
+        return times
+
+    def windows_for(self, day: date, tzinfo) -> list[tuple[datetime, datetime]]:
+        """Return the (start, end) polling windows on ``day``, sorted."""
+        windows = []
+        for t in self.times_for(day):
+            center = datetime.combine(day, t, tzinfo=tzinfo)
+            windows.append((center - self.window, center + self.window))
+        windows.sort()
+        return windows
+
+    def _windows_around(self, now: datetime):
+        # Start from yesterday so a window crossing midnight is not missed.
+        first = now.date() - timedelta(days=1)
+        for offset in range(_LOOKAHEAD_DAYS + 1):
+            yield from self.windows_for(first + timedelta(days=offset), now.tzinfo)
+
+    def is_active(self, now: datetime) -> bool:
+        """Return True if ``now`` falls inside a polling window."""
+        return any(start <= now <= end for start, end in self._windows_around(now))
+
+    def next_window_start(self, now: datetime) -> Optional[datetime]:
+        """Return the start of the next window after ``now``, if any."""
+        for start, _ in self._windows_around(now):
+            if start > now:
+                return start
+        return None
+
+    def next_delay(
+        self,
+        now: datetime,
+        active_interval: float,
+        inactive_interval: float,
+    ) -> Optional[float]:
+        """Return seconds until the scheduler should wake up next.
+
+        Inside a window this is ``active_interval``. Outside, it is the time to
+        the next window start, shortened to ``inactive_interval`` when
+        background polling is enabled (non-zero).
+        """
+        if self.is_active(now):
+            return active_interval
+
+        delays = []
+        next_start = self.next_window_start(now)
+        if next_start is not None:
+            delays.append((next_start - now).total_seconds())
+        if inactive_interval:
+            delays.append(inactive_interval)
+        if not delays:
+            return None
+        return max(1.0, min(delays))
+
+
+class MyBusStopPollScheduler:
+    """Drive automatic refreshes from a PollSchedule."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        schedule: PollSchedule,
+        refresh: Callable[[], Awaitable[None]],
+        active_interval: float = ACTIVE_SCAN_INTERVAL,
+        inactive_interval: float = INACTIVE_SCAN_INTERVAL,
+    ) -> None:
+        self.hass = hass
+        self.schedule = schedule
+        self._refresh = refresh
+        self._active_interval = active_interval
+        self._inactive_interval = inactive_interval
+        self._unsub: Optional[CALLBACK_TYPE] = None
+        self._stopped = False
+
+    @classmethod
+    def from_options(
+        cls,
+        hass: HomeAssistant,
+        options: Mapping[str, Any],
+        refresh: Callable[[], Awaitable[None]],
+    ) -> "MyBusStopPollScheduler":
+        """Build a scheduler from config entry options."""
+        return cls(
+            hass,
+            PollSchedule.from_options(options),
+            refresh,
+            active_interval=options.get(CONF_ACTIVE_SCAN_INTERVAL, ACTIVE_SCAN_INTERVAL),
+            inactive_interval=options.get(CONF_INACTIVE_SCAN_INTERVAL, INACTIVE_SCAN_INTERVAL),
+        )
+
+    @callback
+    def async_start(self) -> None:
+        """Start scheduling refreshes (no-op without configured bus times)."""
+        if not self.schedule.enabled:
+            _LOGGER.debug("No bus times configured, automatic polling disabled")
+            return
+        self._schedule_next()
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the pending wake-up."""
+        self._stopped = True
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _schedule_next(self) -> None:
+        if self._stopped:
+            return
+        now = dt_util.now()
+        delay = self.schedule.next_delay(
+            now, self._active_interval, self._inactive_interval
+        )
+        if delay is None:
+            _LOGGER.debug("No upcoming polling window, automatic polling idle")
+            return
+        _LOGGER.debug(
+            "Next scheduled poll in %.0fs (%s window)",
+            delay,
+            "inside" if self.schedule.is_active(now) else "outside",
+        )
+        self._unsub = async_call_later(self.hass, delay, self._async_tick)
+
+    async def _async_tick(self, _now: datetime) -> None:
+        self._unsub = None
+        now = dt_util.now()
+        try:
+            if self._inactive_interval or self.schedule.is_active(now):
+                await self._refresh()
+        except Exception as err:  # keep the schedule alive
+            _LOGGER.warning("Scheduled poll failed: %s", err)
+        finally:
+            self._schedule_next()
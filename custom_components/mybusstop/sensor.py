@@ -1,75 +1,108 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    DOMAIN as SENSOR_DOMAIN,
+    SensorDeviceClass,
+    SensorEntity,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_PER_ROUTE_ENTITIES,
+    DEFAULT_PER_ROUTE_ENTITIES,
+    ETA_REFRESH_INTERVAL,
+    ROUTE_STALE_AFTER,
+    ROUTE_STATUS_REFRESH_INTERVAL,
+)
+from .entity import (
+    MyBusStopAggregateEntity,
+    MyBusStopRouteEntity,
+    async_remove_route_entities,
+)
+from .eta import EtaEngine, EtaEstimate
+from .metrics import ApiMetrics
+from .models import BusPosition
+from .registry import RouteRegistry
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def _find_most_recent_route_data(all_data: Dict[int, Dict[str, Any]]) -> Optional[tuple[int, Dict[str, Any]]]:
-    """Find the route with the most recent last_seen timestamp."""
-    if not all_data:
-        _LOGGER.debug("_find_most_recent_route_data: all_data is empty")
-        return None
-    
-    _LOGGER.debug("_find_most_recent_route_data: checking %d routes: %s", len(all_data), list(all_data.keys()))
-    
-    most_recent = None
-    most_recent_route_id = None
-    
-    for route_id, data in all_data.items():
-        last_seen = data.get("last_seen")
-        _LOGGER.debug("Route %s: last_seen=%s, data keys=%s", route_id, last_seen, list(data.keys()))
-        if not last_seen:
-            continue
-        
-        if most_recent is None or last_seen > most_recent:
-            most_recent = last_seen
-            most_recent_route_id = route_id
-    
-    if most_recent_route_id is not None:
-        _LOGGER.debug("Selected route %s with last_seen=%s", most_recent_route_id, most_recent)
-        return most_recent_route_id, all_data[most_recent_route_id]
-    
-    _LOGGER.warning("No route with valid last_seen found. Routes data: %s", all_data)
-    return None
-
-
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     data = hass.data[DOMAIN][entry.entry_id]
-    routes = data.get("routes", [])
+    registry = data["registry"]
 
     entities = [
         MyBusStopBusSensor(
             hass=hass,
             entry_id=entry.entry_id,
-            routes=routes,
+            registry=registry,
         ),
         MyBusStopRoutesSensor(
             hass=hass,
             entry_id=entry.entry_id,
-            routes=routes,
+            registry=registry,
+        ),
+        MyBusStopEtaSensor(
+            hass=hass,
+            entry_id=entry.entry_id,
+            registry=registry,
         ),
     ]
+    entities.extend(
+        MyBusStopMetricSensor(
+            hass=hass, entry_id=entry.entry_id, registry=registry, key=key
+        )
+        for key in METRIC_SENSORS
+    )
+
+    if entry.options.get(CONF_PER_ROUTE_ENTITIES, DEFAULT_PER_ROUTE_ENTITIES):
+        entities.extend(
+            MyBusStopRouteSensor(hass, entry.entry_id, registry, route_id)
+            for route_id in registry
+        )
+
+        @callback
+        def _async_routes_changed(added: set[int], removed: set[int]) -> None:
+            """Add sensors for routes found by discovery."""
+            if added:
+                async_add_entities(
+                    MyBusStopRouteSensor(hass, entry.entry_id, registry, route_id)
+                    for route_id in added
+                )
+
+        entry.async_on_unload(registry.async_add_listener(_async_routes_changed))
+    else:
+        async_remove_route_entities(hass, entry.entry_id, SENSOR_DOMAIN)
 
     async_add_entities(entities)
 
 
-class MyBusStopBusSensor(SensorEntity):
+def _route_status(position: Optional[BusPosition], now: float) -> str:
+    """Return ``active`` if the route's bus was seen recently, else ``inactive``."""
+    if position is None:
+        return "inactive"
+    if position.last_seen_ts is not None:
+        return "active" if now - position.last_seen_ts <= ROUTE_STALE_AFTER else "inactive"
+    # Unparseable timestamp; assume it's relatively recent
+    return "active" if position.last_seen else "inactive"
+
+
+class MyBusStopBusSensor(MyBusStopAggregateEntity, SensorEntity):
     """Aggregated sensor representing the active bus across all routes."""
     _attr_icon = "mdi:bus"
 
@@ -77,84 +110,49 @@ class MyBusStopBusSensor(SensorEntity):
         self,
         hass: HomeAssistant,
         entry_id: str,
-        routes: list,
+        registry: RouteRegistry,
     ) -> None:
-        self.hass = hass
-        self._entry_id = entry_id
-        self._routes = routes
+        super().__init__(hass, entry_id, registry)
         self._attr_unique_id = f"{entry_id}_bus"
         self._attr_name = "MyBusStop Bus"
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
-        result = _find_most_recent_route_data(all_data) is not None
-        if not result:
-            _LOGGER.debug("%s: Entity unavailable, data: %s", self._attr_unique_id, all_data)
-        return result
+        return self._route_data.active is not None
 
     @property
     def native_value(self) -> Optional[str]:
         """Return bus number from most recent route."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
-        result = _find_most_recent_route_data(all_data)
+        result = self._route_data.active
         if result:
             _, data = result
-            return data.get("bus_number")
+            return data.bus_number
         return None
 
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
         """Return attributes including current route and location."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
-        result = _find_most_recent_route_data(all_data)
+        result = self._route_data.active
         
         if not result:
             return {}
         
         route_id, data = result
         
-        # Find route name
-        route_name = None
-        for r in self._routes:
-            if int(r["id"]) == route_id:
-                route_name = r.get("name", f"Route {route_id}")
-                break
-        
         return {
             "current_route_id": route_id,
-            "current_route_name": route_name or f"Route {route_id}",
-            "latitude": data.get("latitude"),
-            "longitude": data.get("longitude"),
-            "checkin_time": data.get("checkin_time"),
-            "last_seen": data.get("last_seen"),
-            "timezone_offset": data.get("timezone_offset"),
+            "current_route_name": self._registry.name(route_id),
+            "latitude": data.latitude,
+            "longitude": data.longitude,
+            "checkin_time": data.checkin_time,
+            "last_seen": data.last_seen,
+            "timezone_offset": data.timezone_offset,
+            "stale": self._stale,
         }
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={(DOMAIN, "mybusstop_device")},
-            name="MyBusStop",
-            manufacturer="MyBusStop",
-        )
-
-    async def async_added_to_hass(self) -> None:
-        """Register event listener when entity is added."""
-        self.async_on_remove(
-            self.hass.bus.async_listen(
-                f"{DOMAIN}_update",
-                self._handle_update_event,
-            )
-        )
-
-    async def _handle_update_event(self, event) -> None:
-        """Handle update event from service."""
-        self.async_write_ha_state()
 
-
-class MyBusStopRoutesSensor(SensorEntity):
+class MyBusStopRoutesSensor(MyBusStopAggregateEntity, SensorEntity):
     """Sensor showing all routes and their status."""
     _attr_icon = "mdi:routes"
 
@@ -162,73 +160,294 @@ class MyBusStopRoutesSensor(SensorEntity):
         self,
         hass: HomeAssistant,
         entry_id: str,
-        routes: list,
+        registry: RouteRegistry,
     ) -> None:
-        self.hass = hass
-        self._entry_id = entry_id
-        self._routes = routes
+        super().__init__(hass, entry_id, registry)
         self._attr_unique_id = f"{entry_id}_routes"
         self._attr_name = "MyBusStop Routes"
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return len(self._routes) > 0
+        return len(self._registry) > 0
 
     @property
     def native_value(self) -> str:
         """Return count of routes."""
-        count = len(self._routes)
+        count = len(self._registry)
         return f"{count} route{'s' if count != 1 else ''}"
 
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
         """Return detailed status of all routes."""
-        all_data = self.hass.data[DOMAIN][self._entry_id].get("data", {})
+        all_data = self._route_data
+        now = time.time()
         routes_status = {}
         
-        for route in self._routes:
-            route_id = int(route["id"])
-            route_name = route.get("name", f"Route {route_id}")
-            route_data = all_data.get(route_id, {})
-            
-            # Determine if route is active (has recent data)
-            last_seen = route_data.get("last_seen")
-            status = "unknown"
-            
-            if last_seen:
-                # Parse last_seen if it's a string, assume it's relatively recent for now
-                # You may need to adjust this logic based on the actual format
-                status = "active"
-            else:
-                status = "inactive"
+        for route in self._registry.values():
+            route_id = route["id"]
+            route_name = route["name"]
+            position = all_data.get(route_id)
             
             routes_status[str(route_id)] = {
                 "name": route_name,
-                "status": status,
-                "last_seen": last_seen,
-                "bus_number": route_data.get("bus_number"),
+                "status": _route_status(position, now),
+                "last_seen": position.last_seen if position else None,
+                "bus_number": position.bus_number if position else None,
             }
         
-        return {"routes": routes_status}
+        return {"routes": routes_status, "stale": self._stale}
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={(DOMAIN, "mybusstop_device")},
-            name="MyBusStop",
-            manufacturer="MyBusStop",
+    def _inputs_fingerprint(self) -> tuple:
+        """Return a fingerprint of the data this entity renders.
+
+        Each route's status is part of it, as a route turns inactive just by
+        not reporting.
+        """
+        route_data = self._route_data
+        now = time.time()
+        return self._registry.version, self._stale, tuple(
+            (
+                route_id,
+                route_data.fingerprint(route_id),
+                _route_status(route_data.get(route_id), now),
+            )
+            for route_id in self._registry
         )
 
     async def async_added_to_hass(self) -> None:
-        """Register event listener when entity is added."""
+        """Also listen for route changes and re-check activity periodically."""
+        await super().async_added_to_hass()
         self.async_on_remove(
-            self.hass.bus.async_listen(
-                f"{DOMAIN}_update",
-                self._handle_update_event,
+            self._registry.async_add_listener(self._handle_routes_changed)
+        )
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass,
+                self._handle_tick,
+                timedelta(seconds=ROUTE_STATUS_REFRESH_INTERVAL),
             )
         )
 
-    async def _handle_update_event(self, event) -> None:
-        """Handle update event from service."""
+    @callback
+    def _handle_tick(self, _now: Optional[datetime] = None) -> None:
+        """Re-render when a route's status changed by ageing."""
+        self._async_write_if_changed()
+
+    @callback
+    def _handle_routes_changed(self, added: set[int], removed: set[int]) -> None:
+        """Write state when routes are added, removed or renamed."""
+        self._last_fingerprint = self._inputs_fingerprint()
+        self.async_write_ha_state()
+
+
+class MyBusStopEtaSensor(MyBusStopAggregateEntity, SensorEntity):
+    """Minutes until the active bus reaches the configured stop."""
+    _attr_icon = "mdi:bus-clock"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MINUTES
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        registry: RouteRegistry,
+    ) -> None:
+        super().__init__(hass, entry_id, registry)
+        self._attr_unique_id = f"{entry_id}_eta"
+        self._attr_name = "MyBusStop ETA"
+
+    @property
+    def _eta(self) -> EtaEngine:
+        return self.hass.data[DOMAIN][self._entry_id]["eta"]
+
+    def _estimate(self) -> Optional[EtaEstimate]:
+        route_id = self._route_data.active_route_id
+        if route_id is None:
+            return None
+        return self._eta.estimate(route_id, time.time())
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self._estimate() is not None
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return minutes until the active bus arrives."""
+        estimate = self._estimate()
+        return estimate.minutes if estimate else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return the route, distance and confidence behind the estimate."""
+        estimate = self._estimate()
+        if not estimate:
+            return {}
+        return {
+            "route_id": estimate.route_id,
+            "route_name": self._registry.name(estimate.route_id),
+            "distance_m": round(estimate.distance_m),
+            "approach_rate": (
+                round(estimate.approach_rate, 2)
+                if estimate.approach_rate is not None
+                else None
+            ),
+            "confidence": estimate.confidence,
+            "stale": self._stale,
+        }
+
+    def _inputs_fingerprint(self) -> Optional[tuple]:
+        """Return a fingerprint of what this entity renders.
+
+        The estimate itself is part of it, as its confidence decays (and it
+        finally expires) without new data.
+        """
+        estimate = self._estimate()
+        if estimate is None:
+            return None
+        return estimate, self._registry.version, self._stale
+
+    async def async_added_to_hass(self) -> None:
+        """Also re-evaluate periodically, as the estimate ages without polls."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self._handle_tick, timedelta(seconds=ETA_REFRESH_INTERVAL)
+            )
+        )
+
+    @callback
+    def _handle_tick(self, _now: Optional[datetime] = None) -> None:
+        """Re-render when the estimate changed, including by ageing."""
+        self._async_write_if_changed()
+
+
+class MyBusStopRouteSensor(MyBusStopRouteEntity, SensorEntity):
+    """Bus number and position of a single route."""
+    _attr_icon = "mdi:bus"
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        registry: RouteRegistry,
+        route_id: int,
+    ) -> None:
+        super().__init__(hass, entry_id, registry, route_id)
+        self._attr_unique_id = f"{entry_id}_route_{route_id}"
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self._position is not None
+
+    @property
+    def native_value(self) -> Optional[str]:
+        """Return the route's bus number."""
+        position = self._position
+        return position.bus_number if position else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return the route's location and ETA to the stop."""
+        position = self._position
+        if not position:
+            return {}
+        estimate = self.hass.data[DOMAIN][self._entry_id]["eta"].estimate(
+            self._route_id, time.time()
+        )
+        return {
+            "route_id": self._route_id,
+            "route_name": self._registry.name(self._route_id),
+            "latitude": position.latitude,
+            "longitude": position.longitude,
+            "checkin_time": position.checkin_time,
+            "last_seen": position.last_seen,
+            "timezone_offset": position.timezone_offset,
+            "eta_minutes": estimate.minutes if estimate else None,
+            "stale": self._stale,
+        }
+
+
+def _current_latency(metrics: ApiMetrics) -> Optional[float]:
+    current = metrics.endpoints.get("current")
+    if current is None or current.latency.mean is None:
+        return None
+    return round(current.latency.mean, 1)
+
+
+def _current_latency_attributes(metrics: ApiMetrics) -> Dict[str, Any]:
+    current = metrics.endpoints.get("current")
+    if current is None:
+        return {}
+    latency = current.latency.as_dict()
+    return {
+        "requests": current.requests,
+        "errors": current.errors,
+        "p50_ms": latency["p50_ms"],
+        "p95_ms": latency["p95_ms"],
+        "max_ms": latency["max_ms"],
+        "bytes_mean": current.as_dict()["bytes_mean"],
+        "unchanged_rate": metrics.unchanged_rate,
+    }
+
+
+# key: (name, icon, unit, value, attributes)
+METRIC_SENSORS = {
+    "poll_latency": (
+        "MyBusStop Poll Latency",
+        "mdi:timer-outline",
+        UnitOfTime.MILLISECONDS,
+        _current_latency,
+        _current_latency_attributes,
+    ),
+    "relogins": ("MyBusStop Re-logins", "mdi:login", None, lambda m: m.relogins, None),
+    "retries": ("MyBusStop Retries", "mdi:refresh", None, lambda m: m.retries, None),
+    "not_active_polls": (
+        "MyBusStop Inactive Route Polls",
+        "mdi:bus-stop",
+        None,
+        lambda m: m.not_active,
+        None,
+    ),
+}
+
+
+class MyBusStopMetricSensor(MyBusStopAggregateEntity, SensorEntity):
+    """Diagnostic sensor for the account's request metrics (disabled by default)."""
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        registry: RouteRegistry,
+        key: str,
+    ) -> None:
+        super().__init__(hass, entry_id, registry)
+        name, icon, unit, self._value, self._attributes = METRIC_SENSORS[key]
+        self._attr_unique_id = f"{entry_id}_{key}"
+        self._attr_name = name
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit
+
+    @property
+    def _metrics(self) -> ApiMetrics:
+        return self.hass.data[DOMAIN][self._entry_id]["auth"].metrics
+
+    @property
+    def native_value(self) -> Any:
+        return self._value(self._metrics)
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        if self._attributes is None:
+            return None
+        return self._attributes(self._metrics)
+
+    @callback
+    def _handle_update(self, changed_routes: list[int], stale_changed: bool) -> None:
+        """Metrics change on every poll, changed routes or not."""
         self.async_write_ha_state()
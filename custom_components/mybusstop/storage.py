@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+from aiohttp import ClientSession
+from yarl import URL
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import BASE_URL, DOMAIN, STORAGE_SAVE_DELAY, STORAGE_VERSION
+from .models import BusPosition
+
+_LOGGER = logging.getLogger(__name__)
+
+_BASE_URL = URL(BASE_URL)
+
+
+class MyBusStopStorage:
+    """Persist session cookies, routes, positions, ETA profiles and geofences for an entry.
+
+    Lets setup restore the last-known state immediately after a restart and
+    reuse the authenticated session instead of logging in again.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._entry_id = entry_id
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self.cookies: Dict[str, str] = {}
+        self.routes: list[dict] = []
+        self.positions: Dict[int, BusPosition] = {}
+        self.eta_profiles: Dict[str, list] = {}
+        self.geofences: list[dict] = []
+
+    async def async_load(self) -> None:
+        """Load stored state (missing or unreadable data is ignored)."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:  # corrupt file should not block setup
+            _LOGGER.warning("Could not load stored MyBusStop state: %s", err)
+            return
+        if not data:
+            return
+
+        self.cookies = dict(data.get("cookies") or {})
+        self.routes = list(data.get("routes") or [])
+        self.eta_profiles = dict(data.get("eta_profiles") or {})
+        self.geofences = list(data.get("geofences") or [])
+        for rid, raw in (data.get("positions") or {}).items():
+            try:
+                self.positions[int(rid)] = BusPosition(**raw)
+            except (TypeError, ValueError):
+                _LOGGER.debug("Ignoring stored position for route %s", rid)
+        _LOGGER.debug(
+            "Loaded stored state: %d cookie(s), %d route(s), %d position(s)",
+            len(self.cookies),
+            len(self.routes),
+            len(self.positions),
+        )
+
+    @staticmethod
+    def export_cookies(session: ClientSession) -> Dict[str, str]:
+        """Return the MyBusStop cookies held by ``session``."""
+        cookies = session.cookie_jar.filter_cookies(_BASE_URL)
+        return {name: morsel.value for name, morsel in cookies.items()}
+
+    def restore_cookies(self, session: ClientSession) -> bool:
+        """Put stored cookies back into ``session``; True if there were any."""
+        if not self.cookies:
+            return False
+        session.cookie_jar.update_cookies(self.cookies, _BASE_URL)
+        return True
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the entry's current state after a short delay."""
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save the entry's current state now (e.g. before unloading)."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        entry_data: Optional[Dict[str, Any]] = self.hass.data.get(DOMAIN, {}).get(self._entry_id)
+        if entry_data is not None:
+            self.cookies = self.export_cookies(entry_data["auth"].session)
+            self.routes = entry_data["registry"].as_list()
+            self.positions = dict(entry_data["data"])
+            self.eta_profiles = entry_data["eta"].export_profiles()
+            self.geofences = entry_data["geofences"].as_list()
+        return {
+            "cookies": self.cookies,
+            "routes": self.routes,
+            "positions": {
+                str(rid): position.as_dict() for rid, position in self.positions.items()
+            },
+            "eta_profiles": self.eta_profiles,
+            "geofences": self.geofences,
+        }
+
+    async def async_remove(self) -> None:
+        """Delete the stored state."""
+        await self._store.async_remove()
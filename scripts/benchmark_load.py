@@ -0,0 +1,178 @@
+"""Benchmark login, route discovery and full refreshes against the stand-in.
+
+Starts scripts/mybusstop_standin.py in-process and, for each route count,
+measures:
+
+- login: cold login (login page GET + POST) and a re-login with cached tokens
+- discovery: login plus routes from the logged-in page, and from a streamed
+  Index.aspx
+- refresh: MyBusStopPoller.async_refresh over every route (latency
+  percentiles and routes per second), plus the requests the server saw
+
+Usage (from the repository root, in a Home Assistant dev environment):
+
+    python scripts/benchmark_load.py [--routes 1 10 50 100 500] [--latency 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable
+
+from aiohttp import ClientSession, CookieJar
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from custom_components.mybusstop.api import MyBusStopApi, MyBusStopAuth  # noqa: E402
+from custom_components.mybusstop.budget import RequestBudget  # noqa: E402
+from custom_components.mybusstop.const import DOMAIN  # noqa: E402
+from custom_components.mybusstop.eta import EtaEngine  # noqa: E402
+from custom_components.mybusstop.geofence import Geofence, GeofenceEngine  # noqa: E402
+from custom_components.mybusstop.motion import PollPacer  # noqa: E402
+from custom_components.mybusstop.poller import MyBusStopPoller  # noqa: E402
+from custom_components.mybusstop.registry import RouteRegistry  # noqa: E402
+from custom_components.mybusstop.route_data import MyBusStopRouteData  # noqa: E402
+from mybusstop_standin import StandInConfig, StandInServer  # noqa: E402
+
+ENTRY_ID = "benchmark"
+
+
+class _BenchHass:
+    """Just enough of HomeAssistant for MyBusStopPoller."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {DOMAIN: {}}
+        self.events = 0
+        self.bus = SimpleNamespace(async_fire=self._async_fire)
+
+    def _async_fire(self, event_type: str, event_data: Any = None) -> None:
+        self.events += 1
+
+    def async_create_background_task(self, coro: Awaitable[Any], name: str) -> asyncio.Task:
+        return asyncio.ensure_future(coro)
+
+
+async def _timed(func: Callable[[], Awaitable[Any]]) -> float:
+    start = time.perf_counter()
+    await func()
+    return time.perf_counter() - start
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:8.1f} ms"
+
+
+async def bench_routes(routes: int, args: argparse.Namespace) -> None:
+    server = StandInServer(
+        StandInConfig(
+            routes=routes,
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+            inactive_every=args.inactive_every,
+            seed=0,
+        )
+    )
+    base_url = await server.start()
+    # The stand-in runs on an IP address; aiohttp only keeps its cookies
+    # with an unsafe cookie jar.
+    session = ClientSession(cookie_jar=CookieJar(unsafe=True))
+    try:
+        auth = MyBusStopAuth(session, "user", "pass", base_url=base_url)
+        template = MyBusStopApi(session, "user", "pass", 0, auth=auth)
+
+        discovered: list[dict] = []
+
+        async def _discover() -> None:
+            discovered[:] = await template.async_get_routes()
+
+        # Not logged in yet: discovery logs in and parses the logged-in page
+        from_login_page = await _timed(_discover)
+        streamed = await _timed(_discover)
+        assert len(discovered) == routes, (len(discovered), routes)
+
+        cold_login = await _timed(
+            MyBusStopAuth(session, "user", "pass", base_url=base_url).async_login
+        )
+        warm_login = await _timed(auth.async_login)
+
+        hass = _BenchHass()
+        registry = RouteRegistry(discovered)
+        hass.data[DOMAIN][ENTRY_ID] = {
+            "registry": registry,
+            "auth": auth,
+            "apis": {
+                rid: MyBusStopApi(session, "user", "pass", rid, auth=auth) for rid in registry
+            },
+            "data": MyBusStopRouteData(),
+            "eta": EtaEngine(server.config.latitude, server.config.longitude),
+            "geofences": GeofenceEngine(
+                [Geofence("stop", server.config.latitude, server.config.longitude, 500)]
+            ),
+            "motion": PollPacer(),
+            "storage": SimpleNamespace(async_schedule_save=lambda: None),
+        }
+        poller = MyBusStopPoller(
+            hass,
+            ENTRY_ID,
+            args.max_concurrent,
+            args.timeout,
+            budget=RequestBudget(args.rate) if args.rate else None,
+        )
+
+        server.counters.clear()
+        durations = []
+        for _ in range(args.repeat):
+            durations.append(await _timed(poller.async_refresh))
+        total = sum(durations)
+        metrics = auth.metrics
+        p50 = statistics.median(durations)
+        p95 = max(durations) if len(durations) < 20 else statistics.quantiles(durations, n=20)[-1]
+    finally:
+        await session.close()
+        await server.stop()
+
+    print(
+        f"{routes:>5} routes | login cold {_ms(cold_login)} cached {_ms(warm_login)} | "
+        f"discovery with login {_ms(from_login_page)} streamed {_ms(streamed)} | "
+        f"refresh p50 {_ms(p50)} p95 {_ms(p95)} "
+        f"{routes * args.repeat / total:8.0f} routes/s | server {dict(server.counters)} | "
+        f"client retries={metrics.retries} relogins={metrics.relogins} "
+        f"not_active={metrics.not_active} unchanged_rate={metrics.unchanged_rate}"
+    )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--routes", type=int, nargs="+", default=[1, 10, 50, 100, 500])
+    parser.add_argument("--repeat", type=int, default=10, help="refreshes per route count")
+    parser.add_argument("--latency", type=float, default=0.02, help="server seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--inactive-every", type=int, default=0, help="every Nth route has no bus")
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=15)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="requests per second budget (0 = unlimited)"
+    )
+    parser.add_argument("--verbose", action="store_true", help="show integration logs")
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not args.verbose:
+        # Injected failures would otherwise flood the output
+        logging.getLogger("custom_components.mybusstop").setLevel(logging.CRITICAL)
+    for routes in args.routes:
+        await bench_routes(routes, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(_parse_args()))
@@ -0,0 +1,89 @@
+"""Benchmark route discovery parsing on large Index.aspx pages.
+
+Compares the previous full-page regex parsing with the incremental
+RouteOptionParser fed in network-sized chunks.
+
+Usage (from the repository root, in a Home Assistant dev environment):
+
+    python scripts/benchmark_route_parser.py [saved_page.html ...]
+
+Without arguments, synthetic pages of a few sizes are generated.
+"""
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.mybusstop.api import (  # noqa: E402
+    RouteOptionParser,
+    _PLACEHOLDER_NAMES,
+    _STREAM_CHUNK_SIZE,
+)
+
+REPEAT = 20
+
+
+def legacy_parse(html: str) -> list[dict]:
+    """Route parsing as done before RouteOptionParser."""
+    _ = html[:1000]
+    re.findall(r"<select[^>]*>(.*?)</select>", html, re.IGNORECASE | re.DOTALL)
+    routes = []
+    for m in re.finditer(r'<option[^>]*value="(\d+)"[^>]*>([^<]+)</option>', html, re.IGNORECASE):
+        name = m.group(2).strip()
+        if name.lower() in _PLACEHOLDER_NAMES:
+            continue
+        routes.append({"id": int(m.group(1)), "name": name})
+    return routes
+
+
+def streaming_parse(html: str) -> tuple[list[dict], int]:
+    """Feed ``html`` in chunks; return routes and characters consumed."""
+    parser = RouteOptionParser()
+    consumed = 0
+    for start in range(0, len(html), _STREAM_CHUNK_SIZE):
+        chunk = html[start : start + _STREAM_CHUNK_SIZE]
+        consumed += len(chunk)
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.routes, consumed
+
+
+def synthetic_page(routes: int, filler_kb: int) -> str:
+    """Build an Index.aspx-like page with the route select near the top."""
+    head = "<html><head>" + "<script>var x = 1;</script>" * 200 + "</head><body>"
+    select = (
+        '<select name="ddlRoute" id="ddlRoute"><option value="0">-- Select --</option>'
+        + "".join(f'<option value="{100000 + i}">Route {i}</option>' for i in range(routes))
+        + "</select>"
+    )
+    filler = "<div class='row'><span>lorem ipsum</span></div>" * (filler_kb * 1024 // 45)
+    return head + select + filler + "</body></html>"
+
+
+def bench(label: str, html: str) -> None:
+    legacy = timeit.timeit(lambda: legacy_parse(html), number=REPEAT) / REPEAT
+    streaming = timeit.timeit(lambda: streaming_parse(html), number=REPEAT) / REPEAT
+    routes, consumed = streaming_parse(html)
+    print(
+        f"{label:<32} {len(html) / 1024:>8.0f} KiB  routes={len(routes):<4} "
+        f"legacy={legacy * 1000:8.2f} ms  streaming={streaming * 1000:8.2f} ms  "
+        f"read={consumed / 1024:.0f} KiB"
+    )
+
+
+def main(paths: list[str]) -> None:
+    if paths:
+        for path in paths:
+            bench(Path(path).name, Path(path).read_text(encoding="utf-8", errors="replace"))
+        return
+    for routes, filler_kb in ((5, 100), (50, 1000), (500, 5000)):
+        bench(f"synthetic {routes} routes", synthetic_page(routes, filler_kb))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,302 @@
+"""Local stand-in for www.mybusstop.ca.
+
+Emulates the three endpoints the integration talks to:
+
+- ``login.aspx``: GET returns a login form with VIEWSTATE hidden fields; POST
+  checks them and the credentials, sets a session cookie and returns the
+  logged-in Index.aspx page.
+- ``Login/Index.aspx``: a page with a configurable number of route options;
+  redirects to the login page without a valid session.
+- ``Login/Index.aspx/getCurrentNEW``: a scripted GPS track per route.
+
+Latency, failures, session expiry and login form (VIEWSTATE) expiry can be
+injected; a rejected login re-renders the form like the real site. Point the
+client at it with ``MyBusStopAuth(session, username, password, base_url=...)``.
+
+Usage (from the repository root):
+
+    python scripts/mybusstop_standin.py --routes 50 --latency 0.05 --failure-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import random
+import secrets
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from aiohttp import web
+
+LOGIN_PATH = "/login.aspx"
+INDEX_PATH = "/Login/Index.aspx"
+CURRENT_PATH = "/Login/Index.aspx/getCurrentNEW"
+SESSION_COOKIE = "ASP.NET_SessionId"
+VIEWSTATE_GENERATOR = "C2EE9ABB"
+
+_METRES_PER_DEGREE = 111_320.0
+
+
+@dataclass
+class StandInConfig:
+    """Behaviour of the stand-in server."""
+
+    routes: int = 5
+    username: str = "user"
+    password: str = "pass"
+    latency: float = 0.0  # seconds added to every response
+    jitter: float = 0.0  # extra random latency, 0..jitter seconds
+    failure_rate: float = 0.0  # share of getCurrentNEW calls answered with HTTP 500
+    inactive_every: int = 0  # every Nth route has no bus (0 = all active)
+    session_ttl: Optional[float] = None  # seconds before a login expires
+    viewstate_ttl: Optional[float] = None  # seconds a login form's VIEWSTATE is accepted
+    max_viewstates: int = 1000  # issued VIEWSTATEs kept; the oldest are rotated out
+    filler_kb: int = 200  # markup after the route dropdown on Index.aspx
+    first_route_id: int = 100000
+    latitude: float = 45.4215
+    longitude: float = -75.6972
+    track_radius: float = 2000.0  # metres
+    track_period: float = 1200.0  # seconds per lap
+    seed: Optional[int] = None
+
+
+class StandInServer:
+    """aiohttp application emulating MyBusStop, with request counters."""
+
+    def __init__(self, config: Optional[StandInConfig] = None) -> None:
+        self.config = config or StandInConfig()
+        self.counters: Counter[str] = Counter()
+        self._random = random.Random(self.config.seed)
+        self._sessions: dict[str, float] = {}
+        self._viewstates: OrderedDict[str, float] = OrderedDict()  # value -> issued at
+        self._runner: Optional[web.AppRunner] = None
+        self._index_page = self._build_index_page()
+
+    @property
+    def route_ids(self) -> list[int]:
+        first = self.config.first_route_id
+        return list(range(first, first + self.config.routes))
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(LOGIN_PATH, self._handle_login_page)
+        app.router.add_post(LOGIN_PATH, self._handle_login_post)
+        app.router.add_get(INDEX_PATH, self._handle_index)
+        app.router.add_post(CURRENT_PATH, self._handle_current)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the base URL (``port=0`` picks a free port)."""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def expire_sessions(self) -> None:
+        """Invalidate every session, as if the server restarted."""
+        self._sessions.clear()
+
+    def expire_viewstates(self) -> None:
+        """Invalidate every issued login form, as if the app pool recycled."""
+        self._viewstates.clear()
+
+    # Pages
+
+    def _build_index_page(self) -> str:
+        head = "<html><head>" + "<script>var x = 1;</script>" * 200 + "</head><body>"
+        options = "".join(
+            f'<option value="{route_id}">Route {route_id}</option>'
+            for route_id in self.route_ids
+        )
+        select = (
+            '<input type="hidden" name="hiddenUser" id="hiddenUser" value="1" />'
+            '<select name="ddlRoute" id="ddlRoute">'
+            f'<option value="0">-- Select --</option>{options}</select>'
+        )
+        filler = "<div class='row'><span>MyBusStop</span></div>" * (
+            self.config.filler_kb * 1024 // 42
+        )
+        return head + select + filler + "</body></html>"
+
+    def _login_form(self, error: Optional[str] = None) -> str:
+        viewstate = secrets.token_urlsafe(48)
+        self._viewstates[viewstate] = time.monotonic()
+        while len(self._viewstates) > self.config.max_viewstates:
+            self._viewstates.popitem(last=False)
+        validation = secrets.token_urlsafe(24)
+        message = f"<span id='lblError' class='error'>{error}</span>" if error else ""
+        return (
+            "<html><head><title>MyBusStop - Login</title></head><body>"
+            "<div class='header'>MyBusStop</div>"
+            f"{message}<form method='post' action='./login.aspx'>"
+            f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />'
+            '<input type="hidden" name="__VIEWSTATEGENERATOR" '
+            f'id="__VIEWSTATEGENERATOR" value="{VIEWSTATE_GENERATOR}" />'
+            f'<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{validation}" />'
+            '<input name="txtUserName" type="text" /><input name="txtPassword" type="password" />'
+            '<input type="submit" name="cmdLogin" value="Log in" />'
+            "</form></body></html>"
+        )
+
+    # Helpers
+
+    async def _delay(self) -> None:
+        delay = self.config.latency
+        if self.config.jitter:
+            delay += self._random.uniform(0, self.config.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _viewstate_valid(self, viewstate: Optional[str]) -> bool:
+        issued = self._viewstates.get(viewstate or "")
+        if issued is None:
+            return False
+        ttl = self.config.viewstate_ttl
+        return ttl is None or time.monotonic() - issued < ttl
+
+    def _session_valid(self, request: web.Request) -> bool:
+        created = self._sessions.get(request.cookies.get(SESSION_COOKIE, ""))
+        if created is None:
+            return False
+        ttl = self.config.session_ttl
+        return ttl is None or time.monotonic() - created < ttl
+
+    def _position(self, route_id: int, now: float) -> tuple[float, float]:
+        """Point on a circular lap around the configured centre."""
+        index = route_id - self.config.first_route_id
+        angle = 2 * math.pi * (now / self.config.track_period + index / max(1, self.config.routes))
+        dlat = self.config.track_radius * math.sin(angle) / _METRES_PER_DEGREE
+        dlon = (
+            self.config.track_radius
+            * math.cos(angle)
+            / (_METRES_PER_DEGREE * math.cos(math.radians(self.config.latitude)))
+        )
+        return self.config.latitude + dlat, self.config.longitude + dlon
+
+    # Handlers
+
+    async def _handle_login_page(self, request: web.Request) -> web.Response:
+        self.counters["login_get"] += 1
+        await self._delay()
+        return web.Response(text=self._login_form(), content_type="text/html")
+
+    async def _handle_login_post(self, request: web.Request) -> web.Response:
+        self.counters["login_post"] += 1
+        await self._delay()
+        form = await request.post()
+        if (
+            not self._viewstate_valid(form.get("__VIEWSTATE"))
+            or form.get("__VIEWSTATEGENERATOR") != VIEWSTATE_GENERATOR
+            or not form.get("__EVENTVALIDATION")
+        ):
+            # ASP.NET re-renders the form (HTTP 200) for a stale VIEWSTATE
+            self.counters["login_stale_form"] += 1
+            return web.Response(
+                text=self._login_form("Your session has expired. Please log in again."),
+                content_type="text/html",
+            )
+        if (
+            form.get("txtUserName") != self.config.username
+            or form.get("txtPassword") != self.config.password
+        ):
+            self.counters["login_rejected"] += 1
+            return web.Response(
+                text=self._login_form("Invalid username or password."),
+                content_type="text/html",
+            )
+
+        session_id = secrets.token_hex(12)
+        self._sessions[session_id] = time.monotonic()
+        response = web.Response(text=self._index_page, content_type="text/html")
+        response.set_cookie(SESSION_COOKIE, session_id, path="/")
+        return response
+
+    async def _handle_index(self, request: web.Request) -> web.StreamResponse:
+        self.counters["index"] += 1
+        await self._delay()
+        if not self._session_valid(request):
+            raise web.HTTPFound(f"{LOGIN_PATH}?ReturnUrl=%2fLogin%2fIndex.aspx")
+        return web.Response(text=self._index_page, content_type="text/html")
+
+    async def _handle_current(self, request: web.Request) -> web.Response:
+        self.counters["current"] += 1
+        await self._delay()
+        if not self._session_valid(request):
+            self.counters["current_unauthorized"] += 1
+            raise web.HTTPUnauthorized()
+        if self.config.failure_rate and self._random.random() < self.config.failure_rate:
+            self.counters["current_failed"] += 1
+            raise web.HTTPInternalServerError()
+
+        payload = await request.json()
+        route_id = int(payload.get("route_detail_id", 0))
+        index = route_id - self.config.first_route_id
+        every = self.config.inactive_every
+        if not 0 <= index < self.config.routes or (every and index % every == every - 1):
+            return web.json_response({"d": None})
+
+        now = time.time()
+        latitude, longitude = self._position(route_id, now)
+        stamp = datetime.fromtimestamp(now, timezone.utc).strftime("%m/%d/%Y %I:%M:%S %p")
+        return web.json_response(
+            {"d": [f"Bus {index + 1}", stamp, "0", f"{latitude:.6f}", f"{longitude:.6f}", stamp]}
+        )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--routes", type=int, default=StandInConfig.routes)
+    parser.add_argument("--username", default=StandInConfig.username)
+    parser.add_argument("--password", default=StandInConfig.password)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--inactive-every", type=int, default=0)
+    parser.add_argument("--session-ttl", type=float, default=None)
+    parser.add_argument("--viewstate-ttl", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = StandInServer(
+        StandInConfig(
+            routes=args.routes,
+            username=args.username,
+            password=args.password,
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+            inactive_every=args.inactive_every,
+            session_ttl=args.session_ttl,
+            viewstate_ttl=args.viewstate_ttl,
+            seed=args.seed,
+        )
+    )
+    base_url = await server.start(args.host, args.port)
+    print(f"MyBusStop stand-in with {args.routes} route(s) at {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        print(dict(server.counters))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_serve(_parse_args()))
+    except KeyboardInterrupt:
+        pass